@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 15:04:27 2026
+
+agent 17th October 2026
+
+This script benchmarks the CV generation, loading and validation hot paths and
+writes the results as json, so runs from different commits can be compared:
+
+    generation      end-to-end writeJson.py run (into a temporary directory)
+    gitMetadata     history walk without cache, and with a warm HEAD-keyed cache
+    serialize       per-target cmip5CVs.serializeCV, the serializer of writeJson.py,
+                    in each output format
+    load            per-target cold (fresh interpreter) and warm json.load, and
+                    cmip5CVs snapshot loads
+    lookup          CV term membership lookups per second
+    validate        validateDRS paths per second, suggestTerms queries per second
+
+The CVs are generated once into a temporary directory, which the serialize,
+load, lookup and validate benchmarks read, so a fresh clone needs no prior
+writeJson.py run. Synthetic scale-ups replicate the terms of a CV (e.g. --scale institution_id=100)
+and rerun the serialize, lookup and validate benchmarks against the enlarged CVs
+
+Usage:
+    python benchmarkCVs.py --output bench_HEAD.json
+    python benchmarkCVs.py --scale institution_id=100,table_id=100 --compare bench_old.json
+"""
+"""
+agent 17 Oct 2026   - Started
+
+@author: agent
+"""
+
+# %% imports
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import cmip5CVs
+import gitMetadata
+import suggestTerms
+import validateDRS
+
+# %% Settings
+srcPath = os.path.dirname(os.path.realpath(__file__))
+samplePaths = [
+    'CMIP5/output1/NASA-GISS/GISS-E2-R/historical/mon/atmos/Amon/r1i1p1/v20120101/tas/tas_Amon_GISS-E2-R_historical_r1i1p1_185001-200512.nc',
+    'CMIP5/output1/MOHC/HadGEM2-ES/rcp85/day/atmos/day/r2i1p1/v20111128/pr/pr_day_HadGEM2-ES_rcp85_r2i1p1_20051201-20151130.nc',
+    'CMIP5/output1/IPSL/IPSL-CM5A-LR/piControl/mon/ocean/Omon/r1i1p1/v20110324/tos/tos_Omon_IPSL-CM5A-LR_piControl_r1i1p1_180001-279912.nc',
+    'CMIP5/output1/CSIRO_ARCCSS/ACCESS1-0/rcp8.5/mon/ocean/Omon/r1i1p1/v1/tos/tos_Amon_ACCESS1-0_rcp85_r1i1p1_200601-210012.nc',
+]
+sampleBadValues = ['RCP85', 'rcp8.5', 'histrical', 'CSIRO_ARCCSS', 'esmFixClim', 'Amonthly']
+
+
+# %% Functions
+def timeIt(func, repeat=5, number=1):
+    """Call func number times per repeat, returning per-call seconds {min, median, mean}"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {'min': min(samples), 'median': statistics.median(samples),
+            'mean': statistics.mean(samples), 'repeat': repeat, 'number': number}
+
+
+def rate(count, timing):
+    """Return operations per second from a per-call timing of count operations"""
+    return count / timing['median'] if timing['median'] else None
+
+
+def scaleCV(cv, factor):
+    """Return cv with each term replicated factor times under suffixed names"""
+    if factor <= 1:
+        return cv
+    if isinstance(cv, dict):
+        scaled = dict(cv)
+        for ind in range(1, factor):
+            scaled.update((''.join([term, '-', str(ind)]), value) for term, value in cv.items())
+        return scaled
+    return list(cv) + [''.join([term, '-', str(ind)]) for ind in range(1, factor) for term in cv]
+
+
+def generateCVs(outDir):
+    """Run writeJson.py once, writing the CVs into outDir"""
+    subprocess.run([sys.executable, 'writeJson.py', '--outDir', outDir], cwd=srcPath, check=True,
+                   stdout=subprocess.DEVNULL)
+
+
+def benchGeneration(repeat):
+    """Time end-to-end writeJson.py runs writing into a temporary directory"""
+    results = {}
+    tmpDir = tempfile.mkdtemp(prefix='benchCVs')
+    try:
+        command = [sys.executable, 'writeJson.py', '--outDir', tmpDir]
+        results['full'] = timeIt(lambda: subprocess.run(command, cwd=srcPath, check=True,
+                                                        stdout=subprocess.DEVNULL), repeat)
+        results['incremental'] = timeIt(lambda: subprocess.run(command + ['--incremental'], cwd=srcPath,
+                                                               check=True, stdout=subprocess.DEVNULL), repeat)
+    finally:
+        shutil.rmtree(tmpDir)
+    return results
+
+
+def benchGitMetadata(repeat):
+    """Time the git history walk uncached, and with a warm HEAD-keyed cache"""
+    results = {}
+    tmpDir = tempfile.mkdtemp(prefix='benchCVs')
+    cacheFile = os.path.join(tmpDir, 'gitMetadataCache.json')
+    try:
+        results['uncached'] = timeIt(lambda: gitMetadata.GitMetadata(srcPath, cacheFile=None), repeat)
+        gitMetadata.GitMetadata(srcPath, cacheFile=cacheFile)
+        results['cached'] = timeIt(lambda: gitMetadata.GitMetadata(srcPath, cacheFile=cacheFile), repeat)
+        metadata = gitMetadata.GitMetadata(srcPath, cacheFile=cacheFile)
+        results['commits'] = len(metadata.commits)
+        results['lookup'] = timeIt(lambda: metadata.getFileHistory(os.path.join(srcPath, 'writeJson.py')),
+                                   repeat, 1000)
+    finally:
+        shutil.rmtree(tmpDir)
+    return results
+
+
+def benchSerialize(cvs, repeat):
+    """Time per-target cmip5CVs.serializeCV in each output format"""
+    results = {}
+    for cvName, cv in cvs.items():
+        jsonDict = {cvName: cv}
+        results[cvName] = dict((fmt, timeIt(lambda: cmip5CVs.serializeCV(jsonDict, fmt), repeat, 20))
+                               for fmt in cmip5CVs.formatSuffixes)
+    return results
+
+
+def benchLoad(cvDir, repeat):
+    """Time cold (fresh interpreter) and warm loads of each CV file generated in cvDir"""
+    results = {}
+    coldScript = ('import time; t = time.perf_counter(); import json; '
+                  'json.load(open({!r})); print(time.perf_counter() - t)')
+    for cvName in cmip5CVs.masterTargets:
+        fileName = cmip5CVs.getFileName(cvName, cvDir)
+        if not os.path.exists(fileName):
+            continue
+
+        def loadJson():
+            with open(fileName) as fH:
+                json.load(fH)
+
+        cold = [float(subprocess.run([sys.executable, '-c', coldScript.format(fileName)],
+                                     check=True, stdout=subprocess.PIPE).stdout) for _ in range(repeat)]
+        cmip5CVs._snapshotIndex.pop(cvDir, None)
+        results[cvName] = {
+            'bytes': os.path.getsize(fileName),
+            'json_cold': {'min': min(cold), 'median': statistics.median(cold), 'repeat': repeat},
+            'json_warm': timeIt(loadJson, repeat, 20),
+            'snapshot_warm': timeIt(lambda: cmip5CVs.loadCV(cvName, cvDir), repeat, 20),
+        }
+    return results
+
+
+def benchLookup(cvs, repeat):
+    """Time term membership lookups against each CV compiled to a set"""
+    results = {}
+    for cvName, cv in cvs.items():
+        terms = frozenset(cv)
+        probes = list(terms)[:100] + ['notATerm'] * 100
+
+        def lookup():
+            for probe in probes:
+                probe in terms
+
+        results[cvName] = {'terms': len(terms), 'lookups_per_s': rate(len(probes), timeIt(lookup, repeat, 50))}
+    return results
+
+
+def benchValidate(cvs, repeat):
+    """Time validateDRS path validation and suggestTerms queries"""
+    validator = validateDRS.DRSValidator(dict((cvName, set(cv)) for cvName, cv in cvs.items()))
+    paths = samplePaths * 250
+
+    def validate():
+        for path in paths:
+            validator.validate(path)
+
+    results = {'validator_build': timeIt(lambda: validateDRS.DRSValidator(cvs), repeat),
+               'paths_per_s': rate(len(paths), timeIt(validate, repeat))}
+    for cvName in ('experiment_id', 'institution_id', 'table_id'):
+        results[''.join(['suggest_build_', cvName])] = timeIt(
+            lambda: suggestTerms.SuggestionIndex(cvs[cvName]), repeat)
+        # Fresh index per repeat so cached suggestions are not measured
+        queries = []
+        for _ in range(repeat):
+            index = suggestTerms.SuggestionIndex(cvs[cvName])
+            start = time.perf_counter()
+            for value in sampleBadValues:
+                index.suggest(value)
+            queries.append((time.perf_counter() - start) / len(sampleBadValues))
+        results[''.join(['suggest_query_', cvName])] = {'min': min(queries),
+                                                        'median': statistics.median(queries)}
+    return results
+
+
+def compareResults(new, old, prefix=''):
+    """Yield (key, new, old, ratio) for numeric results present in both runs"""
+    for key in sorted(new):
+        if key not in old:
+            continue
+        name = '.'.join([prefix, key]) if prefix else key
+        if isinstance(new[key], dict) and isinstance(old[key], dict):
+            if 'median' in new[key] and 'median' in old[key]:
+                if old[key]['median']:
+                    yield name, new[key]['median'], old[key]['median'], new[key]['median'] / old[key]['median']
+            else:
+                for row in compareResults(new[key], old[key], name):
+                    yield row
+        elif isinstance(new[key], (int, float)) and isinstance(old[key], (int, float)) and old[key]:
+            yield name, new[key], old[key], new[key] / old[key]
+
+
+# %% Main
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark CMIP5 CV generation, loading and validation')
+    parser.add_argument('--output', help='write results to this json file (default: stdout)')
+    parser.add_argument('--repeat', type=int, default=5, help='repeats per benchmark')
+    parser.add_argument('--scale', default='', help='synthetic scale-ups, e.g. institution_id=100,table_id=100')
+    parser.add_argument('--skip', default='', help='comma separated benchmarks to skip, e.g. generation,load')
+    parser.add_argument('--compare', help='earlier results json file to compare against')
+    args = parser.parse_args()
+    skip = set(args.skip.split(','))
+    scales = dict((item.split('=')[0], int(item.split('=')[1])) for item in args.scale.split(',') if item)
+
+    head = gitMetadata.getRepoHead(srcPath)[1]
+    results = {'metadata': {'head': head, 'python': platform.python_version(),
+                            'platform': platform.platform(), 'repeat': args.repeat,
+                            'time': datetime.datetime.now().isoformat(), 'scale': scales}}
+    if 'generation' not in skip:
+        results['generation'] = benchGeneration(args.repeat)
+    if 'gitMetadata' not in skip:
+        results['gitMetadata'] = benchGitMetadata(args.repeat)
+    # The CVs of this checkout, generated once for the remaining benchmarks
+    cvDir = tempfile.mkdtemp(prefix='benchCVs')
+    try:
+        generateCVs(cvDir)
+        cvs = dict((cvName, cmip5CVs.loadCV(cvName, cvDir)) for cvName in cmip5CVs.masterTargets
+                   if os.path.exists(cmip5CVs.getFileName(cvName, cvDir)))
+        if 'serialize' not in skip:
+            results['serialize'] = benchSerialize(cvs, args.repeat)
+        if 'load' not in skip:
+            results['load'] = benchLoad(cvDir, args.repeat)
+        if 'lookup' not in skip:
+            results['lookup'] = benchLookup(cvs, args.repeat)
+        if 'validate' not in skip:
+            results['validate'] = benchValidate(cvs, args.repeat)
+        if scales:
+            scaledCVs = dict((cvName, scaleCV(cv, scales.get(cvName, 1))) for cvName, cv in cvs.items())
+            results['scaled'] = {
+                'serialize': benchSerialize(dict((cvName, scaledCVs[cvName]) for cvName in scales),
+                                            args.repeat),
+                'lookup': benchLookup(dict((cvName, scaledCVs[cvName]) for cvName in scales), args.repeat),
+                'validate': benchValidate(scaledCVs, args.repeat),
+            }
+    finally:
+        shutil.rmtree(cvDir)
+
+    out = json.dumps(results, ensure_ascii=True, sort_keys=True, indent=4, separators=(',', ':'))
+    if args.output:
+        with open(args.output, 'w') as fH:
+            fH.write(out)
+    else:
+        print(out)
+    if args.compare:
+        with open(args.compare) as fH:
+            old = json.load(fH)
+        print('{:<70} {:>12} {:>12} {:>7}'.format('benchmark', 'new', 'old', 'ratio'), file=sys.stderr)
+        for name, newValue, oldValue, ratio in compareResults(results, old):
+            if name.startswith('metadata'):
+                continue
+            print('{:<70} {:>12.6g} {:>12.6g} {:>7.2f}'.format(name, newValue, oldValue, ratio), file=sys.stderr)
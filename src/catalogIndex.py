@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 16:10:48 2026
+
+agent 17th October 2026
+
+This module indexes a catalog of CMIP5 dataset ids, e.g.
+    cmip5.output1.NASA-GISS.GISS-E2-R.historical.mon.atmos.Amon.r1i1p1.v20120101
+into one bitmap per CV term for the institution_id, experiment_id, frequency,
+realm and table_id facets. Bit n of a term's bitmap is set when dataset n uses
+that term. Faceted queries and counts are then bitmap intersections rather
+than catalog scans:
+
+    index = catalogIndex.CatalogIndex.fromIds(ids)
+    index.countBy('institution_id', frequency='mon', realm='ocean', experiment_id='rcp85')
+
+Bitmaps are Python ints, so AND/OR/popcount run in C over machine words.
+Values that are not CV terms are collected per facet under invalidTerm.
+Saved indexes are zlib compressed, which collapses the long zero runs of
+sparse bitmaps
+"""
+"""
+agent 17 Oct 2026   - Started
+
+@author: agent
+"""
+
+# %% imports
+import json
+import struct
+import zlib
+from cmip5CVs import getCV, writeAtomic
+
+# %% Settings
+# Indexed facet -> position in the dot separated dataset id
+idFacets = [
+    ('institution_id', 2),
+    ('experiment_id', 4),
+    ('frequency', 5),
+    ('realm', 6),
+    ('table_id', 7),
+]
+invalidTerm = '__invalid__'
+indexMagic = b'CMIP5IX\x01'
+
+
+# %% Functions
+def bitCount(bitmap):
+    """Return the number of set bits"""
+    try:
+        return bitmap.bit_count()
+    except AttributeError:
+        return bin(bitmap).count('1')
+
+
+def bitPositions(bitmap):
+    """Yield the positions of the set bits, in increasing order"""
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    for byteInd, byte in enumerate(data):
+        if byte:
+            for bit in range(8):
+                if byte >> bit & 1:
+                    yield byteInd * 8 + bit
+
+
+def positionsToBitmap(positions, size):
+    """Return the bitmap with the given bit positions set"""
+    data = bytearray((size + 7) // 8)
+    for pos in positions:
+        data[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(bytes(data), 'little')
+
+
+class CatalogIndex(object):
+    """Per-facet, per-CV-term bitmaps over a list of dataset ids"""
+
+    def __init__(self, ids, bitmaps):
+        self.ids = ids
+        self.bitmaps = bitmaps
+        self.all = (1 << len(ids)) - 1
+
+    @classmethod
+    def fromIds(cls, ids, cvs=None):
+        """Build the index from an iterable of dataset ids
+
+        cvs, {facet: terms}, defaults to the generated CVs. Datanode suffixes
+        (id|host) are ignored, and malformed ids are indexed as invalid
+        """
+        ids = list(ids)
+        if cvs is None:
+            cvs = dict((facet, getCV(facet)) for facet, _ in idFacets)
+        positions = {}
+        termSets = {}
+        for facet, _ in idFacets:
+            terms = list(cvs[facet])
+            positions[facet] = dict((term, []) for term in terms + [invalidTerm])
+            termSets[facet] = frozenset(terms)
+        lastPosition = max(pos for _, pos in idFacets)
+        for row, datasetId in enumerate(ids):
+            fields = datasetId.split('|', 1)[0].split('.')
+            for facet, pos in idFacets:
+                value = fields[pos] if len(fields) > lastPosition else None
+                if value not in termSets[facet]:
+                    value = invalidTerm
+                positions[facet][value].append(row)
+        bitmaps = dict((facet, dict((term, positionsToBitmap(rows, len(ids)))
+                                    for term, rows in termRows.items()))
+                       for facet, termRows in positions.items())
+        return cls(ids, bitmaps)
+
+    def facetBitmap(self, facet, terms):
+        """Return the OR of the bitmaps of one or more terms of a facet"""
+        if isinstance(terms, str):
+            terms = [terms]
+        bitmap = 0
+        for term in terms:
+            bitmap |= self.bitmaps[facet].get(term, 0)
+        return bitmap
+
+    def query(self, **filters):
+        """Return the bitmap of datasets matching all filters, facet=term or facet=[terms]"""
+        bitmap = self.all
+        # Intersect the most selective facets first, so empty results end early
+        for facet, terms in sorted(filters.items(), key=lambda item: bitCount(self.facetBitmap(*item))):
+            bitmap &= self.facetBitmap(facet, terms)
+            if not bitmap:
+                break
+        return bitmap
+
+    def count(self, **filters):
+        """Return the number of datasets matching all filters"""
+        return bitCount(self.query(**filters))
+
+    def countBy(self, facet, **filters):
+        """Return {term: count} for a facet, over datasets matching all filters; zero counts omitted"""
+        selected = self.query(**filters)
+        counts = {}
+        for term, bitmap in self.bitmaps[facet].items():
+            count = bitCount(bitmap & selected)
+            if count:
+                counts[term] = count
+        return counts
+
+    def select(self, **filters):
+        """Return the dataset ids matching all filters"""
+        return [self.ids[row] for row in bitPositions(self.query(**filters))]
+
+    def save(self, fileName):
+        """Write the ids and bitmaps, zlib compressed, via a temp file renamed into place"""
+        idBytes = '\n'.join(self.ids).encode('utf-8')
+        header = json.dumps({'count': len(self.ids), 'idBytes': len(idBytes),
+                             'terms': dict((facet, sorted(termBitmaps))
+                                           for facet, termBitmaps in self.bitmaps.items())}).encode('utf-8')
+        byteLength = (len(self.ids) + 7) // 8
+        compressor = zlib.compressobj()
+
+        def write(fH):
+            fH.write(indexMagic)
+            fH.write(struct.pack('<Q', len(header)))
+            fH.write(header)
+            fH.write(compressor.compress(idBytes))
+            for facet, _ in idFacets:
+                for term in sorted(self.bitmaps[facet]):
+                    fH.write(compressor.compress(self.bitmaps[facet][term].to_bytes(byteLength, 'little')))
+            fH.write(compressor.flush())
+
+        writeAtomic(fileName, write)
+
+    @classmethod
+    def load(cls, fileName):
+        """Read an index written by save"""
+        with open(fileName, 'rb') as fH:
+            if fH.read(len(indexMagic)) != indexMagic:
+                raise ValueError(' '.join(['Not a catalog index file:', fileName]))
+            length, = struct.unpack('<Q', fH.read(8))
+            header = json.loads(fH.read(length).decode('utf-8'))
+            data = zlib.decompress(fH.read())
+        offset = header['idBytes']
+        ids = data[:offset].decode('utf-8').split('\n') if header['count'] else []
+        byteLength = (header['count'] + 7) // 8
+        bitmaps = {}
+        for facet, _ in idFacets:
+            bitmaps[facet] = {}
+            for term in header['terms'][facet]:
+                bitmaps[facet][term] = int.from_bytes(data[offset:offset + byteLength], 'little')
+                offset += byteLength
+        return cls(ids, bitmaps)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 22:31:52 2026
+
+agent 17th October 2026
+
+This script checks the global attributes of CMIP5 netCDF files against the
+required_global_attributes CV, and the experiment_id and table_id attribute
+values against their CVs. Only the file header is parsed: each file is mapped
+with mmap and the classic format header (magic, record count, dimensions, then
+global attributes, https://docs.unidata.ucar.edu/netcdf-c/current/file_format_specifications.html)
+is decoded with struct, stopping before the variable list, so no netCDF library
+is needed and no data pages are read. Classic (CDF1), 64-bit offset (CDF2) and
+64-bit data (CDF5) files are supported; netCDF-4 (HDF5) files are reported as
+unsupported. Files are checked in batches across a process pool
+
+CMIP5 table_id attributes carry the table's date and checksum, e.g.
+"Table Amon (26 July 2011) 976b7fd1d9e1be31dddd28f5dc79b7a1", only the table
+name is checked
+
+Usage:
+    find /data/CMIP5 -name '*.nc' | python checkGlobalAttributes.py --listViolations
+    python checkGlobalAttributes.py listing.txt --report attributes.json
+"""
+"""
+agent 17 Oct 2026   - Started
+
+@author: agent
+"""
+
+# %% imports
+import argparse
+import collections
+import json
+import mmap
+import multiprocessing
+import struct
+import sys
+from cmip5CVs import cvPath, loadCV
+from validateDRS import batched, readPaths
+
+# %% Settings
+# Attributes whose values must be CV terms, attribute -> CV
+cvAttributes = {
+    'experiment_id': 'experiment_id',
+    'table_id': 'table_id',
+}
+batchSize = 200
+# Header tags and nc_type codes, from the netCDF classic format specification
+ncDimension = 0x0A
+ncAttribute = 0x0C
+ncTypes = {1: 'b', 2: 'c', 3: 'h', 4: 'i', 5: 'f', 6: 'd', 7: 'B', 8: 'H', 9: 'I', 10: 'q', 11: 'Q'}
+hdf5Magic = b'\x89HDF\r\n\x1a\n'
+
+
+# %% Functions
+class HeaderReader(object):
+    """Sequential big endian reader over a netCDF classic header in a buffer"""
+
+    def __init__(self, buffer, version):
+        self.buffer = buffer
+        self.offset = 4
+        # CDF5 counts (NON_NEG) are 64 bit, CDF1 and CDF2 32 bit
+        self.countFormat = '>Q' if version == 5 else '>I'
+
+    def unpack(self, fmt):
+        values = struct.unpack_from(fmt, self.buffer, self.offset)
+        self.offset += struct.calcsize(fmt)
+        return values
+
+    def count(self):
+        return self.unpack(self.countFormat)[0]
+
+    def padded(self, size):
+        """Return the next size bytes, skipping the padding to a 4 byte boundary"""
+        if self.offset + size > len(self.buffer):
+            raise ValueError('Truncated netCDF header')
+        data = self.buffer[self.offset:self.offset + size]
+        self.offset += size + (-size % 4)
+        return data
+
+    def name(self):
+        return self.padded(self.count()).decode('utf-8', 'replace')
+
+
+def readGlobalAttributes(fileName):
+    """Return {name: value} of the global attributes of a netCDF classic format file
+
+    Text attributes are returned as str, numeric attributes as a number or tuple
+    """
+    with open(fileName, 'rb') as fH:
+        magic = fH.read(8)
+        if magic == hdf5Magic:
+            raise ValueError('Unsupported format: netCDF-4/HDF5')
+        if len(magic) < 4 or magic[:3] != b'CDF' or magic[3] not in (1, 2, 5):
+            raise ValueError('Not a netCDF classic format file')
+        with mmap.mmap(fH.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            header = HeaderReader(buffer, magic[3])
+            header.count()  # numrecs
+            tag, dimCount = header.unpack('>I')[0], header.count()
+            if tag == ncDimension:
+                for _ in range(dimCount):
+                    header.name()
+                    header.count()
+            elif tag or dimCount:
+                raise ValueError('Malformed netCDF dimension list')
+            tag, attributeCount = header.unpack('>I')[0], header.count()
+            if tag != ncAttribute:
+                if tag or attributeCount:
+                    raise ValueError('Malformed netCDF global attribute list')
+                return {}
+            attributes = {}
+            for _ in range(attributeCount):
+                name = header.name()
+                ncType = header.unpack('>I')[0]
+                if ncType not in ncTypes:
+                    raise ValueError(' '.join(['Unknown nc_type', str(ncType), 'for attribute', name]))
+                valueCount = header.count()
+                typeCode = ncTypes[ncType]
+                data = header.padded(valueCount * struct.calcsize(''.join(['>', typeCode])))
+                if typeCode == 'c':
+                    attributes[name] = data.rstrip(b'\x00').decode('utf-8', 'replace')
+                else:
+                    values = struct.unpack(''.join(['>', str(valueCount), typeCode]), data)
+                    attributes[name] = values[0] if valueCount == 1 else values
+            return attributes
+
+
+class AttributeChecker(object):
+    """Check global attributes against the required_global_attributes CV and CV valued attributes"""
+
+    def __init__(self, required, cvs):
+        self.required = list(required)
+        self.terms = dict((attribute, frozenset(cvs[cvName])) for attribute, cvName in cvAttributes.items())
+
+    def check(self, attributes):
+        """Return [(violation, value)], missing/empty required attributes and values not in their CV"""
+        violations = []
+        for name in self.required:
+            if name not in attributes:
+                violations.append(('missing', name))
+            elif isinstance(attributes[name], str) and not attributes[name].strip():
+                violations.append(('empty', name))
+        for name, terms in self.terms.items():
+            value = attributes.get(name)
+            if not isinstance(value, str) or not value.strip():
+                continue
+            term = value.strip()
+            if name == 'table_id' and term.startswith('Table '):
+                term = term.split()[1]
+            if term not in terms:
+                violations.append((name, term))
+        return violations
+
+
+# Worker process state, set by initWorker
+_checker = None
+
+
+def initWorker(required, cvs):
+    global _checker
+    _checker = AttributeChecker(required, cvs)
+
+
+def checkBatch(fileNames):
+    """Check a batch of files in a worker, returning (count, [(fileName, violations)])"""
+    bad = []
+    for fileName in fileNames:
+        try:
+            violations = _checker.check(readGlobalAttributes(fileName))
+        except (OSError, ValueError, struct.error) as err:
+            violations = [('unreadable', str(err))]
+        if violations:
+            bad.append((fileName, violations))
+    return len(fileNames), bad
+
+
+def checkFiles(fileNames, required, cvs, processes=None, onViolation=None):
+    """Check an iterable of files across a process pool
+
+    Returns (fileCount, badFileCount, {violation: Counter of values}).
+    onViolation, when given, is called with (fileName, violations) for each bad file
+    """
+    counts = collections.defaultdict(collections.Counter)
+    fileCount = badCount = 0
+    with multiprocessing.Pool(processes, initializer=initWorker, initargs=(required, cvs)) as pool:
+        for count, bad in pool.imap(checkBatch, batched(fileNames, batchSize)):
+            fileCount += count
+            badCount += len(bad)
+            for fileName, violations in bad:
+                for violation, value in violations:
+                    counts[violation][value] += 1
+                if onViolation:
+                    onViolation(fileName, violations)
+    return fileCount, badCount, counts
+
+
+# %% Main
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check netCDF global attributes against the CMIP5 CVs')
+    parser.add_argument('files', nargs='*', help='files listing one netCDF path per line (default: stdin)')
+    parser.add_argument('--cvPath', default=cvPath, help='directory containing the CV json files')
+    parser.add_argument('--processes', type=int, help='worker processes (default: cpu count)')
+    parser.add_argument('--report', help='write violation counts to this json file')
+    parser.add_argument('--listViolations', action='store_true',
+                        help='print each failing file and its violations')
+    args = parser.parse_args()
+    required = loadCV('required_global_attributes', args.cvPath)
+    cvs = dict((cvName, list(loadCV(cvName, args.cvPath))) for cvName in set(cvAttributes.values()))
+
+    def printViolation(fileName, violations):
+        print('\t'.join([fileName] + ['='.join(violation) for violation in violations]))
+
+    fileCount, badCount, counts = checkFiles(
+        readPaths(args.files), required, cvs, args.processes,
+        printViolation if args.listViolations else None)
+    print('Files checked:', fileCount, 'failing:', badCount, file=sys.stderr)
+    for violation in sorted(counts):
+        print(' '.join([violation, str(sum(counts[violation].values())), 'violations,',
+                        str(len(counts[violation])), 'distinct values']), file=sys.stderr)
+    if args.report:
+        with open(args.report, 'w') as fH:
+            report = {'files': fileCount, 'failing': badCount,
+                      'violations': {violation: dict(values.most_common())
+                                     for violation, values in counts.items()}}
+            json.dump(report, fH, ensure_ascii=True, sort_keys=True, indent=4, separators=(',', ':'))
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 11:20:05 2026
+
+agent 17th October 2026
+
+This module exposes the CMIP5 controlled vocabularies (CVs) generated by
+writeJson.py as read-only objects, loaded lazily on first access:
+
+    import cmip5CVs
+    'rcp85' in cmip5CVs.experiment_id     # only CMIP5_experiment_id.json is read
+    cmip5CVs.getCV('table_id')
+
+CVs are read-only throughout, dictionaries are returned as
+types.MappingProxyType and lists as tuples, at every level. Each CV is read
+from the binary snapshot CMIP5_CVs.marshal (written by writeJson.py alongside
+the json files; a cache private to this module, not a published format) when
+it exists, reading only that CV's record. The snapshot records the mtime and
+size of each json file as written; when the json file has since changed (a git
+pull or a regeneration without the snapshot) it is parsed instead
+
+Import cost (Python 3.11, Linux, no cached bytecode, measured with python cmip5CVs.py
+and python -X importtime -c 'import cmip5CVs'):
+    import cmip5CVs                    ~3-4 ms (an empty module costs ~1.3 ms on the same host);
+                                       imports only os, marshal, struct and types
+    first CV access, marshal snapshot  ~0.01-0.02 ms per CV plus a stat of its json file, and ~0.05 ms
+                                       to read the snapshot index
+    first CV access, json fallback     ~0.02-0.04 ms per CV, plus ~5 ms to import json on first use
+    repeat access                      dict lookup, cached for the process lifetime
+"""
+"""
+agent 17 Oct 2026   - Started
+agent 17 Oct 2026   - Added constraintTargets, the cross-CV constraints
+agent 17 Oct 2026   - Added append-only facet code registry, facetCodes.json
+agent 17 Oct 2026   - writeSnapshot takes the CVs in memory rather than reading the json files back
+agent 17 Oct 2026   - Added writeAtomic, the shared temp file and rename writer
+agent 17 Oct 2026   - Added readDefinitions, the CVs of a version of writeJson.py
+agent 17 Oct 2026   - getCVHash moved here from writeJson.py
+agent 17 Oct 2026   - serializeCV and formatSuffixes moved here from writeJson.py, timed by benchmarkCVs.py
+agent 17 Oct 2026   - Snapshot records are skipped when their json file has changed since; CVs are
+                      frozen at every level; masterTargets and constraintTargets defined only here
+
+@author: agent
+"""
+
+# %% imports
+import marshal
+import os
+import struct
+import types
+
+# %% Settings
+# The generated CV files reside one level up from this module
+cvPath = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+snapshotName = 'CMIP5_CVs.marshal'
+snapshotMagic = b'CMIP5CV\x02'
+# Generated CVs, imported by writeJson.py
+masterTargets = [
+    'activity_id',
+    'experiment_id',
+    'frequency',
+    'grid_label',
+    'institution_id',
+    'license',
+    'mip_era',
+    'nominal_resolution',
+    'realm',
+    'required_global_attributes',
+    'source_id',
+    'source_type',
+    'table_id'
+]
+# Cross-CV constraints
+constraintTargets = [
+    'experiment_id_constraints',
+    'table_id_constraints'
+]
+# CVs assigned stable integer codes in the append-only registry facetCodes.json
+codedTargets = [
+    'activity_id',
+    'experiment_id',
+    'frequency',
+    'grid_label',
+    'institution_id',
+    'mip_era',
+    'nominal_resolution',
+    'realm',
+    'source_id',
+    'source_type',
+    'table_id'
+]
+# Output file suffix per format written by writeJson.py, appended to <outDir>/CMIP5_<CV>
+formatSuffixes = {
+    'json': '.json',
+    'min': '.min.json',
+    'gz': '.json.gz',
+}
+codesFile = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'facetCodes.json')
+# The versioned source of the CVs; the generated files are not tracked
+sourceFile = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'writeJson.py')
+
+_cache = {}
+_snapshotIndex = {}
+_facetCodes = {}
+
+
+# %% Functions
+def getFileName(cvName, path=cvPath):
+    """Return the json file name writeJson.py uses for a CV"""
+    if cvName == 'mip_era':
+        return os.path.join(path, ''.join([cvName, '.json']))
+    return os.path.join(path, ''.join(['CMIP5_', cvName, '.json']))
+
+
+def freeze(cv):
+    """Return a read-only copy of a CV, dictionaries as MappingProxyType and lists as tuples at every level"""
+    if isinstance(cv, dict):
+        return types.MappingProxyType(dict((key, freeze(value)) for key, value in cv.items()))
+    if isinstance(cv, (list, tuple)):
+        return tuple(freeze(value) for value in cv)
+    return cv
+
+
+def getCVHash(cv):
+    """Return sha256 hex digest of the canonical (sorted, compact) json form of a CV"""
+    import hashlib
+    import json
+    canonical = json.dumps(cv, ensure_ascii=True, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def serializeCV(jsonDict, fmt):
+    """Return the bytes of a CV file, {cvName: CV, 'version_metadata': ...}, in a formatSuffixes format"""
+    import json
+    if fmt == 'json':
+        return json.dumps(jsonDict, ensure_ascii=True, sort_keys=True, indent=4,
+                          separators=(',', ':')).encode('utf-8')
+    minified = json.dumps(jsonDict, ensure_ascii=True, sort_keys=True,
+                          separators=(',', ':')).encode('utf-8')
+    if fmt == 'gz':
+        import gzip
+        # mtime=0 keeps the compressed bytes identical for identical content
+        return gzip.compress(minified, mtime=0)
+    return minified
+
+
+def jsonStamp(cvName, path=cvPath):
+    """Return (mtime_ns, size) of a CV's json file, None when absent"""
+    try:
+        stat = os.stat(getFileName(cvName, path))
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def writeAtomic(outFile, data):
+    """Write outFile via a uniquely named temp file beside it, renamed into place
+
+    data is bytes, or a callable writing to the open binary file. Concurrent
+    writers never share a temp file, and the temp file is removed when the
+    write fails. Returns the number of bytes written
+    """
+    import tempfile
+    fd, tmpFile = tempfile.mkstemp(prefix='.', suffix='.tmp', dir=os.path.dirname(outFile) or '.')
+    try:
+        with os.fdopen(fd, 'wb') as fH:
+            if callable(data):
+                data(fH)
+            else:
+                fH.write(data)
+            size = fH.tell()
+        os.chmod(tmpFile, 0o644)
+        os.replace(tmpFile, outFile)
+    except BaseException:
+        os.remove(tmpFile)
+        raise
+    return size
+
+
+def readSnapshotIndex(path=cvPath):
+    """Return ({cvName: (offset, length, jsonStamp)}, snapshot file name), or (None, None) when absent"""
+    if path in _snapshotIndex:
+        return _snapshotIndex[path]
+    snapshotFile = os.path.join(path, snapshotName)
+    result = (None, None)
+    if os.path.exists(snapshotFile):
+        with open(snapshotFile, 'rb') as fH:
+            if fH.read(len(snapshotMagic)) == snapshotMagic:
+                headerLength, = struct.unpack('<I', fH.read(4))
+                index = marshal.loads(fH.read(headerLength))
+                dataStart = len(snapshotMagic) + 4 + headerLength
+                index = dict((cvName, (dataStart + offset, length, stamp))
+                             for cvName, (offset, length, stamp) in index.items())
+                result = (index, snapshotFile)
+    _snapshotIndex[path] = result
+    return result
+
+
+def loadCV(cvName, path=cvPath):
+    """Read a CV from the snapshot, or its json file, without caching
+
+    The snapshot record is used only while the json file is as it was when the
+    snapshot was written
+    """
+    index, snapshotFile = readSnapshotIndex(path)
+    if index is not None and cvName in index and index[cvName][2] == jsonStamp(cvName, path):
+        offset, length, _ = index[cvName]
+        with open(snapshotFile, 'rb') as fH:
+            fH.seek(offset)
+            return marshal.loads(fH.read(length))
+    import json
+    with open(getFileName(cvName, path)) as fH:
+        return json.load(fH)[cvName]
+
+
+def readDefinitions(source):
+    """Return {cvName: CV} for the CVs assigned at the top level of writeJson.py source
+
+    The source is parsed, not run. CV values are literals, with string
+    concatenation and ''.join of literals; other CVs, and source that does not
+    parse, are left out
+    """
+    import ast
+
+    def literal(node):
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.Dict) and None not in node.keys:
+            return dict((literal(key), literal(value)) for key, value in zip(node.keys, node.values))
+        if isinstance(node, (ast.List, ast.Tuple)):
+            return [literal(element) for element in node.elts]
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+            left, right = literal(node.left), literal(node.right)
+            if isinstance(left, str) and isinstance(right, str):
+                return left + right
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == 'join' \
+                and isinstance(node.func.value, ast.Constant) and isinstance(node.func.value.value, str) \
+                and len(node.args) == 1 and not node.keywords:
+            parts = literal(node.args[0])
+            if all(isinstance(part, str) for part in parts):
+                return node.func.value.value.join(parts)
+        raise ValueError('Not a literal')
+
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return {}
+    cvs = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name) \
+                and (node.targets[0].id in masterTargets or node.targets[0].id in constraintTargets):
+            try:
+                cvs[node.targets[0].id] = literal(node.value)
+            except (ValueError, TypeError):
+                cvs.pop(node.targets[0].id, None)
+    return cvs
+
+
+def getCV(cvName):
+    """Return a read-only CV, loading it on first access"""
+    try:
+        return _cache[cvName]
+    except KeyError:
+        pass
+    if cvName not in masterTargets and cvName not in constraintTargets:
+        raise KeyError(' '.join(['Unknown CV:', cvName]))
+    _cache[cvName] = cv = freeze(loadCV(cvName))
+    return cv
+
+
+def writeSnapshot(cvs, path=cvPath):
+    """Write the marshal snapshot of cvs, {cvName: CV}, to path
+
+    The CVs are taken as given (writeJson.py passes the CVs it has just
+    assembled), not read back from the json files; the stamp of each json file
+    in path is recorded, so write the snapshot after the json files. The
+    snapshot is written to a temporary file and renamed into place, so readers
+    never see a partial file
+    """
+    blobs = [(cvName, marshal.dumps(cvs[cvName])) for cvName in masterTargets + constraintTargets
+             if cvName in cvs]
+    # Offsets are relative to the end of the header
+    offset = 0
+    index = {}
+    for cvName, blob in blobs:
+        index[cvName] = (offset, len(blob), jsonStamp(cvName, path))
+        offset += len(blob)
+    header = marshal.dumps(index)
+    snapshotFile = os.path.join(path, snapshotName)
+    writeAtomic(snapshotFile, b''.join([snapshotMagic, struct.pack('<I', len(header)), header] +
+                                       [blob for _, blob in blobs]))
+    _snapshotIndex.pop(path, None)
+    return snapshotFile
+
+
+def getFacetCodes(path=codesFile):
+    """Return the code registry {cvName: [terms]}; a term's code is its list position + 1, 0 is missing"""
+    if path not in _facetCodes:
+        import json
+        if os.path.exists(path):
+            with open(path) as fH:
+                _facetCodes[path] = json.load(fH)
+        else:
+            _facetCodes[path] = {}
+    return _facetCodes[path]
+
+
+def updateFacetCodes(cvs, path=codesFile):
+    """Append terms of cvs, {cvName: CV}, missing from the registry; existing codes never change
+
+    Returns {cvName: [added terms]}, the registry is rewritten only when terms were added
+    """
+    import json
+    registry = dict((cvName, list(terms)) for cvName, terms in getFacetCodes(path).items())
+    added = {}
+    for cvName in codedTargets:
+        if cvName not in cvs:
+            continue
+        known = set(registry.setdefault(cvName, []))
+        new = [term for term in cvs[cvName] if term not in known]
+        if new:
+            registry[cvName].extend(new)
+            added[cvName] = new
+    if added:
+        writeAtomic(path, json.dumps(registry, ensure_ascii=True, sort_keys=True, indent=4,
+                                     separators=(',', ':')).encode('utf-8'))
+        _facetCodes[path] = registry
+    return added
+
+
+def __getattr__(name):
+    # PEP 562 - resolve cmip5CVs.<cvName> lazily
+    if name in masterTargets or name in constraintTargets:
+        try:
+            return getCV(name)
+        except (IOError, OSError):
+            pass
+    raise AttributeError(' '.join(['module', __name__, 'has no attribute', name]))
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + masterTargets + constraintTargets)
+
+
+# %% Measure import and first-access cost
+if __name__ == '__main__':
+    import subprocess
+    import sys
+    import timeit
+
+    here = os.path.dirname(os.path.realpath(__file__))
+    importTime = min(timeit.repeat(
+        stmt='import cmip5CVs',
+        setup='import sys; sys.path.insert(0, {!r}); sys.modules.pop("cmip5CVs", None)'.format(here),
+        number=1, repeat=20))
+    print('import cmip5CVs: {:.3f} ms'.format(importTime * 1e3))
+    for useSnapshot in (True, False):
+        _snapshotIndex[cvPath] = readSnapshotIndex(cvPath) if useSnapshot else (None, None)
+        for cvName in masterTargets:
+            if not os.path.exists(getFileName(cvName)):
+                continue
+            elapsed = min(timeit.repeat(lambda: freeze(loadCV(cvName)), number=1, repeat=50))
+            print('{:<8} first access {:<28} {:.3f} ms'.format(
+                'marshal' if useSnapshot else 'json', cvName, elapsed * 1e3))
+        _snapshotIndex.pop(cvPath)
+    # Cold start in a fresh interpreter, including interpreter startup
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import cmip5CVs'],
+                         cwd=here, stderr=subprocess.PIPE).stderr.decode('utf-8')
+    print(out.strip().split('\n')[-1])
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 23:52:06 2026
+
+agent 17th October 2026
+
+Shared pytest fixtures: repo, a small git repository whose CVs change across
+commits of src/writeJson.py, as read by cvHistory.py and gitMetadata.py
+"""
+"""
+agent 17 Oct 2026   - Started
+
+@author: agent
+"""
+
+# %% imports
+import os
+import subprocess
+import pytest
+
+# %% Settings
+# writeJson.py versions committed in order: (commit date, source)
+sources = [
+    ('2020-01-01T00:00:00+00:00',
+     "realm = {'atmos': 'Atmosphere', 'ocean': 'Ocean'}\n"
+     "experiment_id = ['historical', 'esmFixClim1']\n"),
+    ('2021-01-01T00:00:00+00:00',
+     "realm = {'atmos': 'Atmosphere', 'ocean': 'Ocean'}\n"
+     "experiment_id = ['historical', 'rcp85']\n"),
+    # A change outside the CVs is not a CV version
+    ('2022-01-01T00:00:00+00:00',
+     "# Comment\nrealm = {'atmos': 'Atmosphere', 'ocean': 'Ocean'}\n"
+     "experiment_id = ['historical', 'rcp85']\n"),
+    ('2023-01-01T00:00:00+00:00',
+     "realm = {'atmos': 'Atmosphere', 'ocean': ''.join(['Oce', 'an']), 'seaIce': 'Sea Ice'}\n"
+     "experiment_id = ['historical', 'rcp85', 'esmFixClim1']\n"),
+    ('2023-06-01T00:00:00+00:00',
+     "realm = {'atmos': 'Atmosphere', 'ocean': 'Ocean', 'seaIce': 'Sea Ice'}\n"
+     "experiment_id = ['historical', 'rcp85', 'esmFixClim1']\n"),
+]
+
+
+# %% Functions
+def git(args, cwd, date=None):
+    env = dict(os.environ, GIT_AUTHOR_NAME='test', GIT_AUTHOR_EMAIL='test@example.com',
+               GIT_COMMITTER_NAME='test', GIT_COMMITTER_EMAIL='test@example.com')
+    if date:
+        env.update(GIT_AUTHOR_DATE=date, GIT_COMMITTER_DATE=date)
+    return subprocess.run(['git'] + args, cwd=cwd, env=env, check=True,
+                          stdout=subprocess.PIPE).stdout.decode('utf-8').strip()
+
+
+@pytest.fixture(scope='module')
+def repo(tmp_path_factory):
+    path = tmp_path_factory.mktemp('repo')
+    os.mkdir(path / 'src')
+    git(['init', '-q'], path)
+    hashes = []
+    for ind, (date, source) in enumerate(sources):
+        (path / 'src' / 'writeJson.py').write_text(source)
+        git(['add', 'src/writeJson.py'], path)
+        git(['commit', '-q', '-m', ''.join(['Version ', str(ind)])], path, date)
+        hashes.append(git(['rev-parse', 'HEAD'], path))
+    # Generated outputs, added and removed again, are not read
+    (path / 'CMIP5_realm.json').write_text('{"realm": {"land": "Land"}}')
+    git(['add', 'CMIP5_realm.json'], path)
+    git(['commit', '-q', '-m', 'Add outputs'], path, '2024-01-01T00:00:00+00:00')
+    git(['rm', '-q', 'CMIP5_realm.json'], path)
+    git(['commit', '-q', '-m', 'Remove outputs'], path, '2024-02-01T00:00:00+00:00')
+    git(['tag', 'v1.0.0', hashes[1]], path)
+    return str(path), hashes
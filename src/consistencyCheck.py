@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 18:31:40 2026
+
+agent 17th October 2026
+
+This module checks (table_id, frequency, realm, experiment_id) tuples for
+consistency across CVs, using the declarative table_id_constraints and
+experiment_id_constraints written by writeJson.py. The constraints are
+precomputed once into dense boolean compatibility matrices indexed by term
+codes (each term's position in its CV):
+
+    table_frequency[table, frequency]
+    table_realm[table, realm]
+    experiment_realm[experiment, realm]
+    table_experiment[table, experiment]   any realm allowed by both, checked only
+                                          where the realm is not in its CV
+
+so a whole batch of tuples is checked with a few NumPy fancy-indexing
+operations rather than nested conditionals per tuple:
+
+    checker = consistencyCheck.ConsistencyChecker()
+    ok, violations = checker.checkTuples([('Amon', 'mon', 'atmos', 'historical'),
+                                          ('Omon', 'mon', 'ocean', 'amip')])
+"""
+"""
+agent 17 Oct 2026   - Started
+
+@author: agent
+"""
+
+# %% imports
+import itertools
+import numpy as np
+from cmip5CVs import getCV
+
+# %% Settings
+tupleFacets = ['table_id', 'frequency', 'realm', 'experiment_id']
+
+
+# %% Functions
+def constraintMatrix(rowTerms, colTerms, constraints, colCV):
+    """Return a bool matrix [row, col], True where the row term allows the col term
+
+    Row terms without a constraint on colCV allow every col term
+    """
+    colCodes = dict((term, ind) for ind, term in enumerate(colTerms))
+    matrix = np.ones((len(rowTerms), len(colTerms)), dtype=bool)
+    for row, term in enumerate(rowTerms):
+        allowed = constraints.get(term, {}).get(colCV)
+        if allowed is not None:
+            matrix[row, :] = False
+            matrix[row, [colCodes[t] for t in allowed if t in colCodes]] = True
+    return matrix
+
+
+class ConsistencyChecker(object):
+    """Compatibility matrices over the table_id, frequency, realm and experiment_id CVs
+
+    Parameters
+    ----------
+    cvs : dict, optional
+        {cvName: terms} for the four CVs and the two constraint CVs, defaults
+        to the generated CVs
+    """
+
+    def __init__(self, cvs=None):
+        if cvs is None:
+            cvs = dict((cvName, getCV(cvName)) for cvName in
+                       tupleFacets + ['table_id_constraints', 'experiment_id_constraints'])
+        self.terms = dict((facet, np.array(list(cvs[facet]), dtype=object)) for facet in tupleFacets)
+        self.codes = dict((facet, dict((term, ind) for ind, term in enumerate(terms)))
+                          for facet, terms in self.terms.items())
+        tables, experiments = self.terms['table_id'], self.terms['experiment_id']
+        self.table_frequency = constraintMatrix(tables, self.terms['frequency'],
+                                                cvs['table_id_constraints'], 'frequency')
+        self.table_realm = constraintMatrix(tables, self.terms['realm'],
+                                            cvs['table_id_constraints'], 'realm')
+        self.experiment_realm = constraintMatrix(experiments, self.terms['realm'],
+                                                 cvs['experiment_id_constraints'], 'realm')
+        # Boolean matrix product: a table suits an experiment when they share an allowed realm
+        self.table_experiment = (self.table_realm.astype(np.uint8) @
+                                 self.experiment_realm.T.astype(np.uint8)) > 0
+
+    def encode(self, facet, values):
+        """Return int32 term codes for a column of values, -1 for None and values not in the CV"""
+        values = np.asarray(values, dtype=object).ravel()
+        # One dict lookup per row, None and unknown terms fall back to -1
+        return np.fromiter(map(self.codes[facet].get, values, itertools.repeat(-1)), dtype=np.int32,
+                           count=len(values))
+
+    def checkCodes(self, table, frequency, realm, experiment):
+        """Check columns of term codes, returning (ok, {rule: violation mask})
+
+        Codes of -1 (terms not in their CV) fail the unknown_<facet> rule and
+        are not evaluated against the constraints. table_experiment is only
+        evaluated where the realm alone is unknown: with a known realm, the
+        table_realm and experiment_realm rules already cover it
+        """
+        columns = dict(zip(tupleFacets, [np.asarray(c) for c in (table, frequency, realm, experiment)]))
+        violations = {}
+        known = np.ones(len(columns['table_id']), dtype=bool)
+        for facet in tupleFacets:
+            unknown = columns[facet] < 0
+            violations[''.join(['unknown_', facet])] = unknown
+            known &= ~unknown
+        # Index with code 0 where unknown, the result is masked by known
+        t, f, r, e = [np.where(known, columns[facet], 0) for facet in tupleFacets]
+        violations['table_frequency'] = known & ~self.table_frequency[t, f]
+        violations['table_realm'] = known & ~self.table_realm[t, r]
+        violations['experiment_realm'] = known & ~self.experiment_realm[e, r]
+        # A known table and experiment with an unknown realm must still share some realm
+        realmOnly = (columns['realm'] < 0) & (columns['table_id'] >= 0) & (columns['experiment_id'] >= 0)
+        t, e = np.where(realmOnly, columns['table_id'], 0), np.where(realmOnly, columns['experiment_id'], 0)
+        violations['table_experiment'] = realmOnly & ~self.table_experiment[t, e]
+        ok = np.ones(len(known), dtype=bool)
+        for mask in violations.values():
+            ok &= ~mask
+        return ok, violations
+
+    def checkColumns(self, table, frequency, realm, experiment):
+        """Check columns of term strings, returning (ok, {rule: violation mask})"""
+        return self.checkCodes(*[self.encode(facet, values) for facet, values in
+                                 zip(tupleFacets, (table, frequency, realm, experiment))])
+
+    def checkTuples(self, tuples):
+        """Check a sequence of (table_id, frequency, realm, experiment_id) tuples"""
+        if not len(tuples):
+            empty = np.zeros(0, dtype=bool)
+            return empty, {}
+        return self.checkColumns(*zip(*tuples))
+
+
+def summarize(ok, violations):
+    """Return {rule: violation count}, with total and invalid tuple counts"""
+    summary = dict((rule, int(mask.sum())) for rule, mask in violations.items() if mask.any())
+    summary['total'] = int(len(ok))
+    summary['invalid'] = int((~ok).sum())
+    return summary
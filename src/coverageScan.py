@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 20:12:55 2026
+
+agent 17th October 2026
+
+This script scans directory trees of CMIP5 files, checks each filename against
+the CVs and reports the time coverage of every dataset, with gaps and overlaps
+between consecutive files. Filenames follow the DRS:
+
+    <variable>_<table_id>_<model>_<experiment_id>_<ensemble>[_<start>-<end>][-clim].nc
+
+The tree is split into subtrees at --splitDepth, and a process pool walks the
+subtrees with os.scandir. Each worker parses and checks the filenames it finds
+and aggregates them per dataset (one directory and filename prefix), so only
+per-dataset summaries are returned. Date ranges are compared as integer tuples
+at the granularity of the table's frequency (from table_id_constraints), with no
+datetime parsing, and a day boundary at any month end from the 28th counts as
+contiguous so noleap and 360_day calendars do not report false gaps
+
+Usage:
+    python coverageScan.py /data/CMIP5/output1 --problemsOnly > coverage.jsonl
+"""
+"""
+agent 17 Oct 2026   - Started
+
+@author: agent
+"""
+
+# %% imports
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import re
+import sys
+from cmip5CVs import getCV, loadCV
+
+# %% Settings
+ensemblePattern = re.compile(r'r\d+i\d+p\d+$')
+# Date string lengths accepted per frequency, and the step between files in minutes (subdaily)
+dateLengths = {'yr': (4,), 'mon': (6,), 'monC': (6,), 'day': (8,),
+               '6hr': (10, 12), '3hr': (10, 12), '1hr': (10, 12)}
+stepMinutes = {'6hr': 360, '3hr': 180, '1hr': 60}
+
+
+# %% Functions
+def parseDate(value):
+    """Return a date string as an int tuple (year, month, day, hour, minute) truncated to its length"""
+    fields = [value[0:4], value[4:6], value[6:8], value[8:10], value[10:12]]
+    return tuple(int(field) for field in fields if field)
+
+
+def nextDay(end, start):
+    """Return True when start (y, m, d) is the day after end in some CF calendar"""
+    if start[:2] == end[:2]:
+        return start[2] == end[2] + 1
+    monthAfter = (end[0] + (end[1] == 12), end[1] % 12 + 1)
+    return start[:2] == monthAfter and start[2] == 1 and end[2] >= 28
+
+
+def contiguity(end, start, frequency):
+    """Compare the end of one file with the start of the next
+
+    Returns 0 when contiguous, a negative number for an overlap and a positive
+    number for a gap
+    """
+    if start <= end:
+        return -1
+    if frequency == 'yr':
+        return start[0] - end[0] - 1
+    if frequency in ('mon', 'monC'):
+        return (start[0] * 12 + start[1]) - (end[0] * 12 + end[1]) - 1
+    if frequency == 'day':
+        return 0 if nextDay(end[:3], start[:3]) else 1
+    # Subdaily, minutes apart across at most one (calendar tolerant) day boundary
+    endMinutes = end[3] * 60 + (end[4] if len(end) > 4 else 0)
+    startMinutes = start[3] * 60 + (start[4] if len(start) > 4 else 0)
+    if start[:3] == end[:3]:
+        delta = startMinutes - endMinutes
+    elif nextDay(end[:3], start[:3]):
+        delta = 1440 + startMinutes - endMinutes
+    else:
+        return 1
+    return delta - stepMinutes[frequency]
+
+
+class FileNameChecker(object):
+    """Parse and check DRS filenames against the CVs"""
+
+    def __init__(self, tables, experiments, tableConstraints):
+        self.tables = frozenset(tables)
+        self.experiments = frozenset(experiments)
+        # A table fixes the frequency when it allows exactly one
+        self.tableFrequency = dict((table, constraint['frequency'][0])
+                                   for table, constraint in tableConstraints.items()
+                                   if len(constraint.get('frequency', [])) == 1)
+
+    def parse(self, fileName):
+        """Return (datasetKey, frequency, start, end, violations); start/end None when absent"""
+        stem = fileName[:-3]
+        if stem.endswith('-clim'):
+            stem = stem[:-5]
+        fields = stem.split('_')
+        if len(fields) < 5:
+            return None, None, None, None, [('filename', fileName)]
+        variable, table, model, experiment, ensemble = fields[:5]
+        violations = []
+        if table not in self.tables:
+            violations.append(('table_id', table))
+        if experiment not in self.experiments:
+            violations.append(('experiment_id', experiment))
+        if not ensemblePattern.match(ensemble):
+            violations.append(('ensemble_member', ensemble))
+        key = '_'.join(fields[:5])
+        frequency = self.tableFrequency.get(table)
+        if len(fields) == 5:
+            if frequency not in (None, 'fx'):
+                violations.append(('time_range', ''.join(['missing for ', frequency])))
+            return key, frequency, None, None, violations
+        dates = fields[5].split('-')
+        if len(dates) != 2 or not all(d.isdigit() for d in dates) or len(dates[0]) != len(dates[1]):
+            violations.append(('time_range', fields[5]))
+            return key, frequency, None, None, violations
+        if frequency is None:
+            # Infer from the date granularity where the table does not fix it
+            frequency = {4: 'yr', 6: 'mon', 8: 'day'}.get(len(dates[0]), '1hr')
+        elif frequency == 'fx' or len(dates[0]) not in dateLengths.get(frequency, ()):
+            violations.append(('date_granularity', ':'.join([frequency, fields[5]])))
+            return key, frequency, None, None, violations
+        start, end = parseDate(dates[0]), parseDate(dates[1])
+        if end < start:
+            violations.append(('time_range', fields[5]))
+        return key, frequency, start, end, violations
+
+
+def formatDate(date):
+    """Return an int date tuple as its filename string"""
+    return ''.join(['{:04d}'.format(date[0])] + ['{:02d}'.format(x) for x in date[1:]])
+
+
+def summarizeDataset(directory, key, frequency, ranges):
+    """Return the coverage summary of one dataset from its (start, end, fileName) ranges"""
+    ranges.sort()
+    summary = {'directory': directory, 'dataset': key, 'frequency': frequency, 'files': len(ranges),
+               'start': formatDate(ranges[0][0]), 'end': formatDate(max(r[1] for r in ranges)),
+               'gaps': [], 'overlaps': []}
+    latestEnd, latestFile = ranges[0][1], ranges[0][2]
+    for start, end, fileName in ranges[1:]:
+        status = contiguity(latestEnd, start, frequency)
+        if status > 0:
+            summary['gaps'].append([latestFile, fileName])
+        elif status < 0:
+            summary['overlaps'].append([latestFile, fileName])
+        if end > latestEnd:
+            latestEnd, latestFile = end, fileName
+    return summary
+
+
+# Worker process state, set by initWorker
+_checker = None
+
+
+def initWorker(tables, experiments, tableConstraints):
+    global _checker
+    _checker = FileNameChecker(tables, experiments, tableConstraints)
+
+
+def scanTree(root, recurse=True):
+    """Walk root with os.scandir, returning (fileCount, [dataset summaries], [(path, violations)])"""
+    fileCount = 0
+    summaries = []
+    bad = []
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        datasets = collections.defaultdict(list)
+        frequencies = {}
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as err:
+            bad.append((directory, [('scandir', str(err))]))
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if recurse:
+                    stack.append(entry.path)
+            elif entry.name.endswith('.nc'):
+                fileCount += 1
+                key, frequency, start, end, violations = _checker.parse(entry.name)
+                if violations:
+                    bad.append((entry.path, violations))
+                if start is not None:
+                    datasets[key].append((start, end, entry.name))
+                    frequencies[key] = frequency
+        for key, ranges in datasets.items():
+            summaries.append(summarizeDataset(directory, key, frequencies[key], ranges))
+    return fileCount, summaries, bad
+
+
+def splitTree(root, depth):
+    """Return (subtrees to walk, directories above depth holding files) for distribution across workers"""
+    level = [root]
+    shallow = []
+    for _ in range(depth):
+        nextLevel = []
+        for directory in level:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            subdirectories = [entry.path for entry in entries if entry.is_dir(follow_symlinks=False)]
+            if len(subdirectories) < len(entries):
+                shallow.append(directory)
+            nextLevel.extend(subdirectories)
+        if not nextLevel:
+            # Nothing deeper, the last level is scanned as subtrees
+            return level, [d for d in shallow if d not in level]
+        level = nextLevel
+    return level, shallow
+
+
+def scanTask(task):
+    """Scan one subtree, or only the files of one directory above the split depth"""
+    kind, path = task
+    return scanTree(path, recurse=kind == 'tree')
+
+
+def scan(roots, splitDepth=2, processes=None):
+    """Scan roots across a process pool, yielding (fileCount, summaries, bad) per subtree"""
+    tasks = []
+    for root in roots:
+        subtrees, shallow = splitTree(root, splitDepth)
+        tasks.extend(('flat', directory) for directory in shallow)
+        tasks.extend(('tree', subtree) for subtree in subtrees)
+    initargs = (list(getCV('table_id')), list(getCV('experiment_id')), loadCV('table_id_constraints'))
+    with multiprocessing.Pool(processes, initializer=initWorker, initargs=initargs) as pool:
+        for result in pool.imap_unordered(scanTask, tasks):
+            yield result
+
+
+# %% Main
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scan CMIP5 file trees for time coverage gaps and overlaps')
+    parser.add_argument('roots', nargs='+', help='directories to scan')
+    parser.add_argument('--splitDepth', type=int, default=2,
+                        help='directory depth at which subtrees are distributed to workers')
+    parser.add_argument('--processes', type=int, help='worker processes (default: cpu count)')
+    parser.add_argument('--problemsOnly', action='store_true',
+                        help='only report datasets with gaps or overlaps')
+    parser.add_argument('--violations', help='write filename violations to this file, one per line')
+    args = parser.parse_args()
+
+    violationsFile = open(args.violations, 'w') if args.violations else None
+    totals = collections.Counter()
+    for fileCount, summaries, bad in scan(args.roots, args.splitDepth, args.processes):
+        totals['files'] += fileCount
+        totals['datasets'] += len(summaries)
+        totals['invalidFiles'] += len(bad)
+        for summary in summaries:
+            totals['gaps'] += len(summary['gaps'])
+            totals['overlaps'] += len(summary['overlaps'])
+            if not args.problemsOnly or summary['gaps'] or summary['overlaps']:
+                print(json.dumps(summary, sort_keys=True))
+        if violationsFile:
+            for path, violations in bad:
+                violationsFile.write('\t'.join([path] + ['='.join(v) for v in violations]) + '\n')
+    if violationsFile:
+        violationsFile.close()
+    print(' '.join(['{}: {}'.format(name, totals[name]) for name in
+                    ['files', 'datasets', 'gaps', 'overlaps', 'invalidFiles']]), file=sys.stderr)
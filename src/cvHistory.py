@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 19:05:16 2026
+
+agent 17th October 2026
+
+This module answers point-in-time questions about the CVs, e.g. "was
+esmFixClim1 a valid experiment_id as of version X", without checking out old
+commits. The generated CV files are not tracked, so the CVs are read from
+their versioned source: every committed version of src/writeJson.py is
+extracted once, the commits coming from the gitMetadata history walk and the
+file contents from a single git cat-file --batch process, and its CV literals
+are parsed (cmip5CVs.readDefinitions) without running it. The validity of each
+term is stored as half-open intervals [first, last) over the version sequence
+(the commits that changed any CV, oldest first), and queries are answered by
+bisection over those intervals. The index is cached on disk keyed by HEAD
+
+    history = cvHistory.CVHistory()
+    history.isValid('experiment_id', 'esmFixClim1', asOf='v1.0.0')
+    history.diff('experiment_id', '2023-01-01', 'HEAD')
+
+asOf accepts a version index, a commit hash (or unique prefix), a tag, 'HEAD',
+a datetime or an ISO 8601 date string
+"""
+"""
+agent 17 Oct 2026   - Started
+agent 17 Oct 2026   - CVs read from the committed versions of writeJson.py, not the untracked outputs
+
+@author: agent
+"""
+
+# %% imports
+import bisect
+import datetime
+import json
+import os
+from cmip5CVs import constraintTargets, masterTargets, writeAtomic
+import gitMetadata
+
+# %% Settings
+cacheFile = os.path.join(os.path.dirname(os.path.realpath(__file__)), '.cvHistoryCache.json')
+cacheVersion = 2
+
+
+# %% Functions
+def cvTerms(cv):
+    """Return the terms of a CV, the keys of dictionary CVs"""
+    return list(cv)
+
+
+class CVHistory(object):
+    """Term validity intervals over the committed versions of every CV
+
+    Parameters
+    ----------
+    path : str, optional
+        Any file or directory inside the repository
+    cacheFile : str, optional
+        On-disk cache, reused when its recorded HEAD matches. None disables it,
+        and the gitMetadata cache
+    """
+
+    def __init__(self, path=os.path.dirname(os.path.realpath(__file__)), cacheFile=cacheFile):
+        self.metadata = gitMetadata.GitMetadata(path, gitMetadata.cacheFile if cacheFile else None)
+        cache = None
+        if cacheFile and os.path.exists(cacheFile):
+            try:
+                with open(cacheFile) as fH:
+                    cache = json.load(fH)
+                if cache.get('version') != cacheVersion or cache.get('head') != self.metadata.head:
+                    cache = None
+            except ValueError:
+                cache = None
+        if cache is None:
+            cache = self.build()
+            if cacheFile:
+                writeAtomic(cacheFile, json.dumps(cache).encode('utf-8'))
+        self.versions = cache['versions']
+        self.intervals = cache['intervals']
+        # Lookup structures for resolving asOf
+        self.versionTimes = [version['timestamp'] for version in self.versions]
+        self.versionIndex = dict((version['hash'], ind) for ind, version in enumerate(self.versions))
+        # Every commit, oldest first, mapped to the last CV version at or before it
+        self.commitVersion = {}
+        current = -1
+        for commit in reversed(self.metadata.commits):
+            current = self.versionIndex.get(commit['hash'], current)
+            self.commitVersion[commit['hash']] = current
+            for tag in commit['tags']:
+                self.commitVersion[tag] = current
+
+    def build(self):
+        """Read every committed version of the CV source and compute term intervals"""
+        cvNames = masterTargets + constraintTargets
+        # Commits that changed any CV in writeJson.py, oldest first
+        versions = []
+        intervals = dict((cvName, {}) for cvName in cvNames)
+        previous = {}
+        for commit, cvs in self.metadata.readCVVersions():
+            if not cvs:
+                # Source that does not parse, keep the CVs as they were
+                continue
+            changed = [cvName for cvName in cvNames if cvs.get(cvName) != previous.get(cvName)]
+            if not changed:
+                continue
+            version = len(versions)
+            versions.append({'hash': commit['hash'], 'timestamp': commit['timestamp'],
+                             'date': commit['date'], 'message': commit['message'], 'cvs': changed})
+            # Open and close term intervals as CVs change
+            for cvName in changed:
+                before = set(cvTerms(previous.get(cvName, [])))
+                after = set(cvTerms(cvs.get(cvName, [])))
+                for term in after - before:
+                    intervals[cvName].setdefault(term, []).append([version, None])
+                for term in before - after:
+                    intervals[cvName][term][-1][1] = version
+            previous = cvs
+        # Close open intervals at the end of the version sequence
+        for cvName, termIntervals in intervals.items():
+            for spans in termIntervals.values():
+                if spans[-1][1] is None:
+                    spans[-1][1] = len(versions)
+        return {'version': cacheVersion, 'head': self.metadata.head, 'versions': versions,
+                'intervals': intervals}
+
+    def resolve(self, asOf):
+        """Return the version index in force at asOf, -1 before the first version"""
+        if asOf is None or asOf == 'HEAD':
+            return len(self.versions) - 1
+        if isinstance(asOf, int):
+            return asOf
+        if isinstance(asOf, str):
+            if asOf in self.commitVersion:
+                return self.commitVersion[asOf]
+            matches = [commitHash for commitHash in self.commitVersion if commitHash.startswith(asOf)]
+            if len(matches) == 1 and len(asOf) >= 4:
+                return self.commitVersion[matches[0]]
+            try:
+                asOf = datetime.datetime.fromisoformat(asOf)
+            except ValueError:
+                raise KeyError(' '.join(['Unknown version, commit or date:', asOf]))
+        if isinstance(asOf, datetime.date) and not isinstance(asOf, datetime.datetime):
+            asOf = datetime.datetime(asOf.year, asOf.month, asOf.day)
+        if asOf.tzinfo is None:
+            asOf = asOf.replace(tzinfo=datetime.timezone.utc)
+        return bisect.bisect_right(self.versionTimes, asOf.timestamp()) - 1
+
+    def isValid(self, cvName, term, asOf=None):
+        """Return True when term was in the CV at asOf"""
+        version = self.resolve(asOf)
+        spans = self.intervals[cvName].get(term, [])
+        ind = bisect.bisect_right(spans, [version, float('inf')]) - 1
+        return ind >= 0 and spans[ind][0] <= version < spans[ind][1]
+
+    def termsAt(self, cvName, asOf=None):
+        """Return the set of terms in the CV at asOf"""
+        version = self.resolve(asOf)
+        return set(term for term, spans in self.intervals[cvName].items()
+                   if any(start <= version < end for start, end in spans))
+
+    def diff(self, cvName, fromAsOf, toAsOf=None):
+        """Return (added, removed) term sets between two points in time"""
+        before, after = self.termsAt(cvName, fromAsOf), self.termsAt(cvName, toAsOf)
+        return after - before, before - after
+
+    def termHistory(self, cvName, term):
+        """Return [(validFrom, validUntil)] version dicts for a term, validUntil None while current"""
+        return [(self.versions[start], self.versions[end] if end < len(self.versions) else None)
+                for start, end in self.intervals[cvName].get(term, [])]
+
+
+# %% Main
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Query CMIP5 CV terms over their git history')
+    parser.add_argument('cvName', help='CV, e.g. experiment_id')
+    parser.add_argument('term', nargs='?', help='term to check; omit to list terms')
+    parser.add_argument('--asOf', help='version index, commit, tag or ISO date (default: HEAD)')
+    parser.add_argument('--diff', metavar='FROM', help='list terms added/removed between FROM and --asOf')
+    args = parser.parse_args()
+    asOf = int(args.asOf) if args.asOf and args.asOf.lstrip('-').isdigit() else args.asOf
+    history = CVHistory()
+    if args.diff:
+        fromAsOf = int(args.diff) if args.diff.lstrip('-').isdigit() else args.diff
+        added, removed = history.diff(args.cvName, fromAsOf, asOf)
+        for term in sorted(added):
+            print('+', term)
+        for term in sorted(removed):
+            print('-', term)
+    elif args.term:
+        print(args.term, 'valid' if history.isValid(args.cvName, args.term, asOf) else 'not valid',
+              'as of', args.asOf or 'HEAD')
+        for validFrom, validUntil in history.termHistory(args.cvName, args.term):
+            print('  from', validFrom['hash'][:10], validFrom['date'],
+                  'until', validUntil['hash'][:10] if validUntil else 'now')
+    else:
+        for term in sorted(history.termsAt(args.cvName, asOf)):
+            print(term)
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 17:22:13 2026
+
+agent 17th October 2026
+
+This script serves the CV json files generated by writeJson.py from memory,
+over a small asyncio HTTP/1.1 server (keep-alive, no dependencies):
+
+    GET  /cv                        {cvName: content sha256} for all loaded CVs
+    GET  /cv/<cvName>               the CV, {cvName: CV}
+    GET  /validate/<cvName>/<term>  {"term": term, "valid": bool[, "suggestions": [...]]}
+    POST /validate                  body {cvName: [terms]} -> {"valid": {cvName: {term: bool}},
+                                    "suggestions": {cvName: {term: [...]}}}, suggestions
+                                    for invalid terms filled in with ?suggest=1, else {}
+
+GET responses carry an ETag, the sha256 of the CV's canonical json content
+(as computed by cmip5CVs.getCVHash), and requests with a matching
+If-None-Match are answered 304 Not Modified with no body. HEAD is answered as
+GET, without the body.
+
+The json files are polled for changes; a changed set is loaded in a worker
+thread and swapped in as a whole, so requests in flight complete against the
+CVs they started with and none are dropped during a reload. Batch bodies
+larger than inlineBody are validated in a worker thread, so a large batch does
+not hold up other connections
+
+Usage:
+    python cvService.py --port 8005
+    curl -s localhost:8005/validate/experiment_id/rcp85
+"""
+"""
+agent 17 Oct 2026   - Started
+agent 17 Oct 2026   - POST /validate response shape independent of ?suggest, large batches off the event loop
+
+@author: agent
+"""
+
+# %% imports
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import urllib.parse
+from cmip5CVs import cvPath, getCVHash, getFileName, masterTargets
+from suggestTerms import SuggestionIndex
+
+# %% Settings
+reasons = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+maxBody = 64 * 1024 * 1024
+inlineBody = 64 * 1024
+
+
+# %% Functions
+def dumps(obj):
+    return json.dumps(obj, ensure_ascii=True, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+class CVState(object):
+    """An immutable set of loaded CVs, replaced as a whole on reload"""
+
+    def __init__(self, path):
+        self.mtimes = getMtimes(path)
+        self.cvs = {}
+        self.bodies = {}
+        self.hashes = {}
+        self.etags = {}
+        self.terms = {}
+        for cvName in self.mtimes:
+            with open(getFileName(cvName, path)) as fH:
+                cv = json.load(fH)[cvName]
+            self.cvs[cvName] = cv
+            self.bodies[cvName] = dumps({cvName: cv})
+            self.hashes[cvName] = getCVHash(cv)
+            self.etags[cvName] = ''.join(['"', self.hashes[cvName], '"'])
+            self.terms[cvName] = frozenset(cv)
+        self.listBody = dumps(self.hashes)
+        self.listEtag = ''.join(['"', hashlib.sha256(self.listBody).hexdigest(), '"'])
+        self.suggestIndexes = {}
+        # Suggestions are made from the event loop and from batch worker threads
+        self.suggestLock = threading.Lock()
+
+    def suggest(self, cvName, term):
+        with self.suggestLock:
+            if cvName not in self.suggestIndexes:
+                self.suggestIndexes[cvName] = SuggestionIndex(sorted(self.terms[cvName]))
+            return [suggestion for suggestion, _ in self.suggestIndexes[cvName].suggest(term)]
+
+
+def getMtimes(path):
+    """Return {cvName: mtime_ns} for the CV json files present in path"""
+    mtimes = {}
+    for cvName in masterTargets:
+        try:
+            mtimes[cvName] = os.stat(getFileName(cvName, path)).st_mtime_ns
+        except OSError:
+            pass
+    return mtimes
+
+
+class CVService(object):
+    """HTTP request handling over the current CVState"""
+
+    def __init__(self, path=cvPath, pollInterval=2.0):
+        self.path = path
+        self.pollInterval = pollInterval
+        self.state = CVState(path)
+
+    async def watch(self):
+        """Poll the CV files, loading and swapping in a new CVState when any changes"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.pollInterval)
+            try:
+                if getMtimes(self.path) != self.state.mtimes:
+                    self.state = await loop.run_in_executor(None, CVState, self.path)
+                    print('Reloaded CVs:', ', '.join(sorted(self.state.cvs)))
+            except (OSError, ValueError, KeyError) as err:
+                # Keep serving the current CVs, retry on the next poll
+                print('Reload failed:', err)
+
+    def handle(self, method, target, headers, body):
+        """Return (status, headers, body) for one request"""
+        state = self.state
+        url = urllib.parse.urlsplit(target)
+        parts = [urllib.parse.unquote(part) for part in url.path.strip('/').split('/') if part]
+        query = urllib.parse.parse_qs(url.query)
+        get = method in ('GET', 'HEAD')
+        if get and parts == ['cv']:
+            return self.cached(headers, state.listEtag, state.listBody)
+        if get and len(parts) == 2 and parts[0] == 'cv':
+            if parts[1] not in state.cvs:
+                return self.error(404, ' '.join(['Unknown CV:', parts[1]]))
+            return self.cached(headers, state.etags[parts[1]], state.bodies[parts[1]])
+        if get and len(parts) == 3 and parts[0] == 'validate':
+            cvName, term = parts[1:]
+            if cvName not in state.cvs:
+                return self.error(404, ' '.join(['Unknown CV:', cvName]))
+            result = {'term': term, 'valid': term in state.terms[cvName]}
+            if not result['valid']:
+                result['suggestions'] = state.suggest(cvName, term)
+            return self.cached(headers, state.etags[cvName], dumps(result))
+        if parts == ['validate']:
+            if method != 'POST':
+                return self.error(405, 'Use POST for batch validation')
+            try:
+                request = json.loads(body.decode('utf-8'))
+                if not isinstance(request, dict) or not all(
+                        isinstance(terms, list) and all(isinstance(term, str) for term in terms)
+                        for terms in request.values()):
+                    raise ValueError('expected {cvName: [terms]}')
+            except ValueError as err:
+                return self.error(400, ' '.join(['Invalid json body:', str(err)]))
+            unknown = sorted(cvName for cvName in request if cvName not in state.cvs)
+            if unknown:
+                return self.error(404, ' '.join(['Unknown CV:', ', '.join(unknown)]))
+            valid = dict((cvName, dict((term, term in state.terms[cvName]) for term in terms))
+                         for cvName, terms in request.items())
+            suggestions = {}
+            if query.get('suggest', ['0'])[0] not in ('0', ''):
+                suggestions = dict((cvName, dict((term, state.suggest(cvName, term))
+                                                 for term, isValid in termResults.items() if not isValid))
+                                   for cvName, termResults in valid.items())
+            return 200, {'Content-Type': 'application/json'}, dumps({'valid': valid, 'suggestions': suggestions})
+        return self.error(404, ' '.join(['Unknown endpoint:', url.path]))
+
+    def cached(self, headers, etag, body):
+        responseHeaders = {'ETag': etag, 'Cache-Control': 'no-cache', 'Content-Type': 'application/json'}
+        match = headers.get('if-none-match', '')
+        if etag in [tag.strip() for tag in match.split(',')] or match.strip() == '*':
+            return 304, responseHeaders, b''
+        return 200, responseHeaders, body
+
+    def error(self, status, message):
+        return status, {'Content-Type': 'application/json'}, dumps({'error': message})
+
+    async def serveConnection(self, reader, writer):
+        """Serve requests on one connection until it closes or asks to"""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                requestLine = await reader.readline()
+                if not requestLine.strip():
+                    break
+                try:
+                    method, target, version = requestLine.decode('latin-1').split()
+                except ValueError:
+                    await self.respond(writer, *self.error(400, 'Malformed request line'), keepAlive=False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                    if length < 0:
+                        raise ValueError
+                except ValueError:
+                    # The body cannot be framed, so the connection cannot be kept
+                    await self.respond(writer, *self.error(400, 'Invalid Content-Length'), keepAlive=False)
+                    break
+                if length > maxBody:
+                    await self.respond(writer, *self.error(413, 'Request body too large'), keepAlive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                keepAlive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1' or \
+                    headers.get('connection', '').lower() == 'keep-alive'
+                try:
+                    if len(body) > inlineBody:
+                        status, responseHeaders, responseBody = await loop.run_in_executor(
+                            None, self.handle, method, target, headers, body)
+                    else:
+                        status, responseHeaders, responseBody = self.handle(method, target, headers, body)
+                except Exception as err:
+                    status, responseHeaders, responseBody = self.error(500, str(err))
+                if method == 'HEAD':
+                    responseBody = b''
+                await self.respond(writer, status, responseHeaders, responseBody, keepAlive)
+                if not keepAlive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, headers, body, keepAlive=True):
+        lines = [' '.join(['HTTP/1.1', str(status), reasons.get(status, '')])]
+        headers = dict(headers)
+        headers['Content-Length'] = str(len(body))
+        headers['Connection'] = 'keep-alive' if keepAlive else 'close'
+        lines.extend(': '.join([name, value]) for name, value in headers.items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+
+async def serve(host, port, path=cvPath, pollInterval=2.0):
+    service = CVService(path, pollInterval)
+    server = await asyncio.start_server(service.serveConnection, host, port)
+    print('Serving', len(service.state.cvs), 'CVs on', ', '.join(
+        ':'.join(str(x) for x in sock.getsockname()[:2]) for sock in server.sockets))
+    watcher = asyncio.ensure_future(service.watch())
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+
+
+# %% Main
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve and validate against the CMIP5 CVs over HTTP')
+    parser.add_argument('--host', default='127.0.0.1', help='address to bind')
+    parser.add_argument('--port', type=int, default=8005, help='port to bind')
+    parser.add_argument('--cvPath', default=cvPath, help='directory containing the CV json files')
+    parser.add_argument('--poll', type=float, default=2.0, help='seconds between CV file change checks')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.cvPath, args.poll))
+    except KeyboardInterrupt:
+        pass
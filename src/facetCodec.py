@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 21:02:37 2026
+
+agent 17th October 2026
+
+This module encodes catalog facet columns, e.g. millions of 'NASA-GISS' or
+'historicalGHG' strings, as small integer codes and stores catalogs as a
+memory-mappable columnar file. Codes come from the append-only registry
+facetCodes.json (maintained by writeJson.py through cmip5CVs.updateFacetCodes):
+a term's code is its registry position + 1, 0 marks a missing or unknown value,
+and new terms are only ever appended, so codes written today decode the same
+after any later regeneration. Columns are uint8 where a facet has up to 255
+terms (codes 0-255), otherwise uint16
+
+    codec = facetCodec.FacetCodec()
+    codes = codec.encode('institution_id', column)       # uint8 array
+    facetCodec.writeCatalog('catalog.cmip5cat', {'institution_id': column, 'size': sizes})
+    catalog = facetCodec.Catalog('catalog.cmip5cat')     # columns are np.memmap
+    catalog.countBy('institution_id')                    # np.bincount over the codes
+
+The catalog file is an 8 byte magic, a little endian uint64 header length, a
+json header listing each column's name, dtype, offset and facet, then the raw
+column arrays, each aligned to 64 bytes
+"""
+"""
+agent 17 Oct 2026   - Started
+agent 17 Oct 2026   - uint8 codes up to 255 terms, not 254
+
+@author: agent
+"""
+
+# %% imports
+import itertools
+import json
+import struct
+import numpy as np
+from cmip5CVs import getFacetCodes, writeAtomic
+
+# %% Settings
+catalogMagic = b'CMIP5CT\x01'
+alignment = 64
+missingCode = 0
+
+
+# %% Functions
+def codeDtype(termCount):
+    """Return the smallest unsigned dtype holding termCount codes plus missingCode"""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if termCount <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    raise ValueError(' '.join(['Too many terms to encode:', str(termCount)]))
+
+
+def padding(offset):
+    return -offset % alignment
+
+
+class FacetCodec(object):
+    """Encode and decode facet columns with the stable codes of the registry
+
+    Parameters
+    ----------
+    codes : dict, optional
+        {facet: [terms]} in code order, defaults to facetCodes.json
+    """
+
+    def __init__(self, codes=None):
+        if codes is None:
+            codes = getFacetCodes()
+        self.terms = dict((facet, list(terms)) for facet, terms in codes.items())
+        self.lookup = dict((facet, dict((term, ind + 1) for ind, term in enumerate(terms)))
+                           for facet, terms in self.terms.items())
+        self.decodeTables = {}
+
+    def __contains__(self, facet):
+        return facet in self.terms
+
+    def dtype(self, facet):
+        return codeDtype(len(self.terms[facet]))
+
+    def encode(self, facet, values, strict=False):
+        """Return the codes of a column of terms, missingCode for None and unknown terms
+
+        values is a sequence, array or pandas.Categorical of terms. With strict,
+        unknown terms raise ValueError instead
+        """
+        if facet not in self.terms:
+            raise KeyError(' '.join(['No codes for facet:', facet]))
+        lookup = self.lookup[facet]
+        dtype = self.dtype(facet)
+        if hasattr(values, 'categories') and hasattr(values, 'codes'):
+            # pandas.Categorical, look up the categories only; a trailing slot maps code -1
+            categories = list(values.categories)
+            table = np.array([lookup.get(category, missingCode) for category in categories] + [missingCode],
+                             dtype=dtype)
+            codes = table[np.where(values.codes < 0, len(categories), values.codes)]
+            unknown = [category for category, code in zip(categories, table) if code == missingCode]
+        else:
+            values = np.asarray(values, dtype=object)
+            # One dict lookup per row, None and unknown terms fall back to missingCode
+            codes = np.fromiter(map(lookup.get, values, itertools.repeat(missingCode)), dtype=dtype,
+                                count=len(values))
+            unknown = set(values[codes == missingCode]) - {None} if strict else []
+        if strict and unknown:
+            raise ValueError(' '.join(['Unknown', facet, 'terms:', ', '.join(sorted(map(str, unknown)))]))
+        return codes
+
+    def decode(self, facet, codes):
+        """Return the object array of terms for a column of codes, None for missingCode"""
+        if facet not in self.decodeTables:
+            self.decodeTables[facet] = np.array([None] + self.terms[facet], dtype=object)
+        table = self.decodeTables[facet]
+        codes = np.asarray(codes)
+        if len(codes) and codes.max() >= len(table):
+            raise ValueError(' '.join(['Codes beyond the', facet, 'registry, update facetCodes.json']))
+        return table[codes]
+
+
+def writeCatalog(fileName, columns, codec=None):
+    """Write {name: values} as a columnar catalog file
+
+    Columns named for a registry facet are encoded, others are stored as
+    arrays of their NumPy dtype (strings as fixed width unicode). All columns
+    must have the same length. The file is written to a temporary file and
+    renamed into place
+    """
+    if codec is None:
+        codec = FacetCodec()
+    arrays = []
+    header = {'rows': None, 'columns': [], 'codes': {}}
+    for name, values in columns.items():
+        if name in codec:
+            array = codec.encode(name, values)
+            header['codes'][name] = len(codec.terms[name])
+        else:
+            array = np.asarray(values)
+            if array.dtype == object:
+                array = array.astype(str)
+        if array.ndim != 1:
+            raise ValueError(' '.join(['Column is not one dimensional:', name]))
+        if header['rows'] is None:
+            header['rows'] = len(array)
+        elif len(array) != header['rows']:
+            raise ValueError(' '.join(['Column length differs:', name]))
+        arrays.append(np.ascontiguousarray(array))
+        header['columns'].append({'name': name, 'dtype': array.dtype.str,
+                                  'facet': name if name in codec else None})
+    header['rows'] = header['rows'] or 0
+    # Offsets depend on the header length, which depends on the offsets; size the header with
+    # placeholder offsets of full width, then pad it to the alignment
+    for column in header['columns']:
+        column['offset'] = 2 ** 63
+    headerLength = len(json.dumps(header).encode('utf-8'))
+    offset = len(catalogMagic) + 8 + headerLength
+    offset += padding(offset)
+    for column, array in zip(header['columns'], arrays):
+        column['offset'] = offset
+        offset += array.nbytes
+        offset += padding(offset)
+    headerBytes = json.dumps(header).encode('utf-8')
+    headerBytes += b' ' * (headerLength - len(headerBytes))
+
+    def write(fH):
+        fH.write(catalogMagic)
+        fH.write(struct.pack('<Q', len(headerBytes)))
+        fH.write(headerBytes)
+        for column, array in zip(header['columns'], arrays):
+            fH.write(b'\x00' * (column['offset'] - fH.tell()))
+            fH.write(array.tobytes())
+
+    writeAtomic(fileName, write)
+    return fileName
+
+
+class Catalog(object):
+    """A columnar catalog file, each column a read-only np.memmap
+
+    Parameters
+    ----------
+    fileName : str
+        File written by writeCatalog
+    codec : FacetCodec, optional
+        Registry to decode facet columns with, defaults to facetCodes.json
+    """
+
+    def __init__(self, fileName, codec=None):
+        self.codec = FacetCodec() if codec is None else codec
+        with open(fileName, 'rb') as fH:
+            if fH.read(len(catalogMagic)) != catalogMagic:
+                raise ValueError(' '.join(['Not a catalog file:', fileName]))
+            length, = struct.unpack('<Q', fH.read(8))
+            header = json.loads(fH.read(length).decode('utf-8'))
+        self.rows = header['rows']
+        self.facets = {}
+        self.columns = {}
+        for column in header['columns']:
+            name, facet = column['name'], column['facet']
+            if facet is not None:
+                # Codes are append-only, so any registry at least as long decodes them
+                if facet not in self.codec or len(self.codec.terms[facet]) < header['codes'][facet]:
+                    raise ValueError(' '.join(['Catalog', fileName, 'uses', facet,
+                                               'codes missing from the registry, update facetCodes.json']))
+                self.facets[name] = facet
+            if self.rows:
+                self.columns[name] = np.memmap(fileName, dtype=np.dtype(column['dtype']), mode='r',
+                                               offset=column['offset'], shape=(self.rows,))
+            else:
+                self.columns[name] = np.zeros(0, dtype=np.dtype(column['dtype']))
+
+    def __len__(self):
+        return self.rows
+
+    def codes(self, name):
+        """Return the stored array of a column, codes for facet columns"""
+        return self.columns[name]
+
+    def column(self, name):
+        """Return a column, facet columns decoded to terms"""
+        if name in self.facets:
+            return self.codec.decode(self.facets[name], self.columns[name])
+        return self.columns[name]
+
+    def code(self, name, term):
+        """Return the code of a term in a facet column"""
+        return self.codec.lookup[self.facets[name]][term]
+
+    def countBy(self, name, mask=None):
+        """Return {term: count} for a facet column, over rows selected by an optional bool mask"""
+        codes = self.columns[name] if mask is None else self.columns[name][mask]
+        counts = np.bincount(codes, minlength=len(self.codec.terms[self.facets[name]]) + 1)
+        terms = self.codec.terms[self.facets[name]]
+        result = dict((terms[code - 1], int(counts[code])) for code in np.flatnonzero(counts[1:]) + 1)
+        if counts[missingCode]:
+            result[None] = int(counts[missingCode])
+        return result
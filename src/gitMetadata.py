@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 09:12:41 2026
+
+agent 17th October 2026
+
+This module collects the git metadata recorded in the version_metadata block of
+each CV json file. The repository history is walked once per run with a single
+git log call, and the result is cached on disk keyed by the HEAD commit so
+repeat runs against an unchanged checkout make no history walk at all. The
+per-CV modified date and note come from the last commit that changed the CV in
+src/writeJson.py, the versioned source of the CVs (the generated files are not
+tracked)
+"""
+"""
+agent 17 Oct 2026   - Started
+agent 17 Oct 2026   - Added readCVVersions, the CVs of each committed version of writeJson.py
+agent 17 Oct 2026   - Added getCVHistory, the last commit changing each CV, for the per-CV version_metadata
+agent 17 Oct 2026   - Record commit unix timestamps, used by cvHistory; versioned the cache format
+
+@author: agent
+"""
+
+# %% imports
+import json
+import os
+import subprocess
+from cmip5CVs import cvPath, getCVHash, readDefinitions, sourceFile, writeAtomic
+
+# Field and record separators for the git log format, unlikely to appear in commit messages
+fieldSep = '\x1f'
+recordSep = '\x1e'
+logFormat = recordSep + fieldSep.join(['%H', '%ct', '%cd', '%s', '%D'])
+dateFormat = 'format:%c %z'
+cacheFile = os.path.join(os.path.dirname(os.path.realpath(__file__)), '.gitMetadataCache.json')
+cacheVersion = 3
+# Count of git subprocess calls made by this module
+gitCallCount = 0
+
+
+# %% Functions
+def runGit(args, cwd):
+    """Run a git command in cwd and return its stdout as text"""
+    global gitCallCount
+    gitCallCount += 1
+    return subprocess.run(['git'] + args, cwd=cwd, check=True, stdout=subprocess.PIPE,
+                          stderr=subprocess.DEVNULL).stdout.decode('utf-8')
+
+
+def getRepoHead(path):
+    """Return (repository top-level path, HEAD commit hash) for the repository containing path"""
+    if os.path.isfile(path):
+        path = os.path.dirname(path)
+    topLevel, head = runGit(['rev-parse', '--show-toplevel', 'HEAD'], path).splitlines()
+    return topLevel, head
+
+
+def walkHistory(topLevel):
+    """Walk the full history of the repository once
+
+    Returns a list of commits, newest first, each a dict with hash, timestamp,
+    date, message, tags and the repository-relative files it touched
+    """
+    out = runGit(['log', '--no-color', ''.join(['--date=', dateFormat]),
+                  ''.join(['--format=', logFormat]), '--name-only'], topLevel)
+    commits = []
+    for record in out.split(recordSep)[1:]:
+        # Each record is the formatted line followed by the --name-only file list
+        lines = record.split('\n')
+        commitHash, timestamp, date, message, refs = lines[0].split(fieldSep)
+        tags = [ref.strip()[5:] for ref in refs.split(',') if ref.strip().startswith('tag: ')]
+        commits.append({'hash': commitHash, 'timestamp': int(timestamp), 'date': date, 'message': message,
+                        'tags': tags, 'files': [f for f in lines[1:] if f]})
+    return commits
+
+
+def readBlobs(topLevel, specs):
+    """Return the contents of <commit>:<path> specs, None where missing, via one git cat-file process"""
+    if not specs:
+        return []
+    process = subprocess.Popen(['git', 'cat-file', '--batch'], cwd=topLevel,
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    out, _ = process.communicate(''.join([''.join([spec, '\n']) for spec in specs]).encode('utf-8'))
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, 'git cat-file --batch')
+    blobs = []
+    offset = 0
+    for _ in specs:
+        end = out.index(b'\n', offset)
+        header = out[offset:end].split()
+        offset = end + 1
+        if header[-1] == b'missing':
+            blobs.append(None)
+            continue
+        size = int(header[2])
+        blobs.append(out[offset:offset + size])
+        offset += size + 1
+    return blobs
+
+
+class GitMetadata(object):
+    """In-memory view over the repository history, built from one git log walk
+
+    Parameters
+    ----------
+    path : str
+        Any file or directory inside the repository
+    cacheFile : str, optional
+        On-disk cache, reused when its recorded HEAD matches the current HEAD.
+        Set to None to disable caching
+    """
+
+    def __init__(self, path, cacheFile=cacheFile):
+        self.topLevel, self.head = getRepoHead(os.path.realpath(path))
+        self.cacheFile = cacheFile
+        self.commits = None
+        self.cvCommits = None
+        if cacheFile and os.path.exists(cacheFile):
+            try:
+                with open(cacheFile) as fH:
+                    cache = json.load(fH)
+                if cache.get('version') == cacheVersion and cache.get('head') == self.head and \
+                        cache.get('topLevel') == self.topLevel:
+                    self.commits = cache['commits']
+                    self.cvCommits = cache['cvCommits']
+            except (ValueError, KeyError):
+                pass
+        if self.commits is None:
+            self.commits = walkHistory(self.topLevel)
+            self.writeCache()
+        self.commitIndex = dict((commit['hash'], commit) for commit in self.commits)
+        # Index last commit per file, commits are newest first
+        self.lastCommit = {}
+        for commit in self.commits:
+            for fileName in commit['files']:
+                self.lastCommit.setdefault(fileName, commit)
+
+    def writeCache(self):
+        if self.cacheFile:
+            writeAtomic(self.cacheFile, json.dumps({'version': cacheVersion, 'head': self.head,
+                                                    'topLevel': self.topLevel, 'commits': self.commits,
+                                                    'cvCommits': self.cvCommits}).encode('utf-8'))
+
+    def relPath(self, path):
+        """Return path relative to the repository top level"""
+        return os.path.relpath(os.path.realpath(path), self.topLevel).replace(os.sep, '/')
+
+    def getFileHistory(self, path):
+        """Return the last commit recorded for path, keyed as in version_metadata"""
+        commit = self.lastCommit.get(self.relPath(path))
+        if commit is None:
+            return {}
+        return {'previous_commit': commit['hash'], 'timeStamp': commit['date'],
+                'commitMessage': commit['message']}
+
+    def readCVVersions(self):
+        """Return [(commit, {cvName: CV})], oldest first, for each commit that changed the CV source
+
+        Every version of the source, src/writeJson.py of this repository, is read
+        with one git cat-file process and parsed with cmip5CVs.readDefinitions
+        """
+        relPath = os.path.relpath(sourceFile, cvPath).replace(os.sep, '/')
+        commits = [commit for commit in reversed(self.commits) if relPath in commit['files']]
+        blobs = readBlobs(self.topLevel, [':'.join([commit['hash'], relPath]) for commit in commits])
+        return [(commit, readDefinitions(blob.decode('utf-8')) if blob is not None else {})
+                for commit, blob in zip(commits, blobs)]
+
+    def getCVHistory(self, cvName, cvHash):
+        """Return the last commit that changed a CV in writeJson.py, keyed as in version_metadata
+
+        cvHash is the cmip5CVs.getCVHash of the CV being written; {} when it
+        differs from the committed CV (uncommitted changes) or the CV was never
+        committed. The CV versions are read on first use and cached with the history
+        """
+        if self.cvCommits is None:
+            # {cvName: [commit hash, content hash]}, the last change and the content at HEAD
+            self.cvCommits = {}
+            for commit, cvs in self.readCVVersions():
+                for name, cv in cvs.items():
+                    contentHash = getCVHash(cv)
+                    if self.cvCommits.get(name, [None, None])[1] != contentHash:
+                        self.cvCommits[name] = [commit['hash'], contentHash]
+                for name in set(self.cvCommits) - set(cvs):
+                    # Removed, or not a literal, in this version
+                    del self.cvCommits[name]
+            self.writeCache()
+        if cvName not in self.cvCommits or self.cvCommits[cvName][1] != cvHash:
+            return {}
+        commit = self.commitIndex[self.cvCommits[cvName][0]]
+        return {'previous_commit': commit['hash'], 'timeStamp': commit['date'],
+                'commitMessage': commit['message']}
+
+    def getVersionId(self):
+        """Return the most recent tag reachable from HEAD, or the abbreviated HEAD hash"""
+        for commit in self.commits:
+            if commit['tags']:
+                return commit['tags'][0]
+        return self.head[:7]
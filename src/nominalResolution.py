@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 21:48:09 2026
+
+agent 17th October 2026
+
+This module computes the nominal_resolution of a model grid from its cell
+geometry, following the CMIP6 definition: the size of a cell is the largest
+great-circle distance between any two of its vertices, the grid's size is the
+area-weighted mean over its cells, and that mean is binned to a km term of the
+nominal_resolution CV ('1x1 degree' is not a size bin and is never returned):
+
+    < 0.72 km -> '0.5 km', 0.72-1.6 -> '1 km', 1.6-3.6 -> '2.5 km', 3.6-7.2 -> '5 km', ...
+
+Cells are processed as NumPy arrays in chunks of rows, accumulating only the
+weighted sums, so memory stays bounded for meshes of tens of millions of cells
+(pass np.memmap or netCDF variables, which read only the chunks sliced). Bounds
+may be unstructured (cells, vertices), curvilinear (y, x, vertices) or
+rectilinear 1-D (n, 2) pairs; NaN vertices pad cells with fewer vertices. With
+cell areas only, a cell's size is taken as its diagonal, sqrt(2 * area)
+
+    size = nominalResolution.meanCellSize(lat_bnds, lon_bnds)   # km
+    nominalResolution.resolutionTerm(size)                      # e.g. '100 km'
+
+Usage:
+    python nominalResolution.py grid1.npz grid2.npz --declared '100 km'
+"""
+"""
+agent 17 Oct 2026   - Started
+
+@author: agent
+"""
+
+# %% imports
+import argparse
+import sys
+import numpy as np
+from cmip5CVs import getCV
+
+# %% Settings
+earthRadius = 6371.0  # km
+chunkSize = 1000000  # cells per chunk
+# Upper bin edge (km) and term, from the CMIP6 nominal_resolution definition
+resolutionBins = [
+    (0.72, '0.5 km'),
+    (1.6, '1 km'),
+    (3.6, '2.5 km'),
+    (7.2, '5 km'),
+    (16., '10 km'),
+    (36., '25 km'),
+    (72., '50 km'),
+    (160., '100 km'),
+    (360., '250 km'),
+    (720., '500 km'),
+    (1600., '1000 km'),
+    (3600., '2500 km'),
+    (7200., '5000 km'),
+    (np.inf, '10000 km')
+]
+
+
+# %% Functions
+def unitVectors(latBounds, lonBounds):
+    """Return the x, y and z components of the unit vectors of (cells, vertices) lat/lon in degrees"""
+    lat, lon = np.radians(latBounds, dtype=np.float64), np.radians(lonBounds, dtype=np.float64)
+    cosLat = np.cos(lat)
+    return cosLat * np.cos(lon), cosLat * np.sin(lon), np.sin(lat)
+
+
+def vertexSizes(x, y, z):
+    """Return the largest vertex to vertex great-circle distance (km) of each cell from unit vectors"""
+    largest = np.zeros(x.shape[0])
+    vertexCount = x.shape[1]
+    for first in range(vertexCount - 1):
+        for second in range(first + 1, vertexCount):
+            chord2 = ((x[:, first] - x[:, second]) ** 2 + (y[:, first] - y[:, second]) ** 2 +
+                      (z[:, first] - z[:, second]) ** 2)
+            # fmax ignores NaN, so NaN padded vertices drop out
+            np.fmax(largest, chord2, out=largest)
+    # Chord to arc, 2 asin(c / 2), is accurate for small cells where acos of the dot product is not
+    return 2 * earthRadius * np.arcsin(np.minimum(np.sqrt(largest) / 2, 1))
+
+
+def vertexAreas(x, y, z):
+    """Return the spherical area (km2) of each convex cell from unit vectors, as a fan from its first vertex"""
+    area = np.zeros(x.shape[0])
+    ax, ay, az = x[:, 0], y[:, 0], z[:, 0]
+    for ind in range(1, x.shape[1] - 1):
+        bx, by, bz = x[:, ind], y[:, ind], z[:, ind]
+        cx, cy, cz = x[:, ind + 1], y[:, ind + 1], z[:, ind + 1]
+        # Solid angle of triangle abc (Van Oosterom and Strackee)
+        triple = np.abs(ax * (by * cz - bz * cy) + ay * (bz * cx - bx * cz) + az * (bx * cy - by * cx))
+        denominator = 1 + (ax * bx + ay * by + az * bz) + (bx * cx + by * cy + bz * cz) + \
+            (cx * ax + cy * ay + cz * az)
+        # NaN padded triangles add nothing
+        area += np.nan_to_num(2 * np.arctan2(triple, denominator))
+    return area * earthRadius ** 2
+
+
+def cellSizes(latBounds, lonBounds):
+    """Return the largest vertex to vertex great-circle distance (km) of each cell
+
+    latBounds, lonBounds : (cells, vertices) arrays in degrees
+    """
+    return vertexSizes(*unitVectors(latBounds, lonBounds))
+
+
+def cellAreas(latBounds, lonBounds):
+    """Return the spherical area (km2) of each convex cell, triangulated as a fan from its first vertex
+
+    latBounds, lonBounds : (cells, vertices) arrays in degrees
+    """
+    return vertexAreas(*unitVectors(latBounds, lonBounds))
+
+
+def rectilinearBounds(latBounds, lonBounds, rows):
+    """Yield (lat, lon) vertex chunks of shape (cells, 4) for 1-D (n, 2) bounds, rows latitudes at a time"""
+    lonBounds = np.asarray(lonBounds)
+    lon = np.stack([lonBounds[:, 0], lonBounds[:, 1], lonBounds[:, 1], lonBounds[:, 0]], axis=-1)
+    for start in range(0, len(latBounds), rows):
+        latChunk = np.asarray(latBounds[start:start + rows])
+        lat = np.stack([latChunk[:, 0], latChunk[:, 0], latChunk[:, 1], latChunk[:, 1]], axis=-1)
+        yield (np.broadcast_to(lat[:, None, :], (len(lat), len(lon), 4)).reshape(-1, 4),
+               np.broadcast_to(lon[None, :, :], (len(lat), len(lon), 4)).reshape(-1, 4))
+
+
+def boundsFromCenters(centers):
+    """Return (n, 2) bounds of a 1-D coordinate, at the midpoints between centers"""
+    centers = np.asarray(centers, dtype=np.float64)
+    edges = np.concatenate([[1.5 * centers[0] - 0.5 * centers[1]],
+                            (centers[1:] + centers[:-1]) / 2,
+                            [1.5 * centers[-1] - 0.5 * centers[-2]]])
+    return np.stack([edges[:-1], edges[1:]], axis=-1)
+
+
+def chunkRows(array, rows, vertices=True):
+    """Yield chunks of rows of an array sliced along its first axis, as (cells, vertices) or flat (cells,)"""
+    for start in range(0, array.shape[0], rows):
+        chunk = np.asarray(array[start:start + rows])
+        yield chunk.reshape(-1, chunk.shape[-1]) if vertices else chunk.ravel()
+
+
+class ResolutionAccumulator(object):
+    """Area-weighted running mean of cell sizes, fed chunk by chunk"""
+
+    def __init__(self):
+        self.weightedSize = 0.
+        self.weight = 0.
+        self.cells = 0
+
+    def add(self, sizes, areas):
+        """Add the sizes and weights (areas) of a chunk of cells; cells with NaN size or area are skipped"""
+        sizes, areas = np.asarray(sizes, dtype=np.float64), np.asarray(areas, dtype=np.float64)
+        valid = np.isfinite(sizes) & np.isfinite(areas) & (areas > 0)
+        self.weightedSize += float((sizes[valid] * areas[valid]).sum())
+        self.weight += float(areas[valid].sum())
+        self.cells += int(valid.sum())
+
+    def addBounds(self, latBounds, lonBounds, areas=None):
+        """Add a chunk of cells from (cells, vertices) bounds, weighted by areas or their spherical area"""
+        x, y, z = unitVectors(latBounds, lonBounds)
+        self.add(vertexSizes(x, y, z), vertexAreas(x, y, z) if areas is None else np.ravel(areas))
+
+    def addAreas(self, areas):
+        """Add a chunk of cells known only by area, sized by their diagonal"""
+        areas = np.ravel(np.asarray(areas, dtype=np.float64))
+        self.add(np.sqrt(2 * areas), areas)
+
+    @property
+    def mean(self):
+        """Area-weighted mean cell size (km), NaN before any cells are added"""
+        return self.weightedSize / self.weight if self.weight else np.nan
+
+
+def meanCellSize(latBounds=None, lonBounds=None, areas=None, chunk=chunkSize):
+    """Return the area-weighted mean cell size (km) of a grid
+
+    latBounds, lonBounds : arrays in degrees, (cells, vertices), (y, x, vertices)
+        or rectilinear (nlat, 2) and (nlon, 2)
+    areas : array, optional
+        Cell areas shaped as the cells, in any unit, weighting the cells when
+        bounds are given; in km2 and sized by their diagonal when bounds are omitted
+    chunk : int, optional
+        Approximate number of cells held in memory at once
+    """
+    accumulator = ResolutionAccumulator()
+    if latBounds is None:
+        if areas is None:
+            raise ValueError('Either bounds or cell areas are required')
+        rowCells = int(np.prod(areas.shape[1:]))
+        for areaChunk in chunkRows(areas, max(1, chunk // rowCells), vertices=False):
+            accumulator.addAreas(areaChunk)
+        return accumulator.mean
+    # Cells have 3 or more vertices, so (n, 2) bounds are 1-D rectilinear coordinates
+    rectilinear = len(latBounds.shape) == 2 and latBounds.shape[1] == 2 and lonBounds.shape[-1] == 2
+    if rectilinear:
+        rows = max(1, chunk // len(lonBounds))
+        chunks = rectilinearBounds(latBounds, lonBounds, rows)
+    else:
+        rows = max(1, chunk // int(np.prod(latBounds.shape[1:-1])))
+        chunks = zip(chunkRows(latBounds, rows), chunkRows(lonBounds, rows))
+    areaChunks = chunkRows(areas, rows, vertices=False) if areas is not None else iter(lambda: None, 0)
+    for (latChunk, lonChunk), areaChunk in zip(chunks, areaChunks):
+        accumulator.addBounds(latChunk, lonChunk, areaChunk)
+    return accumulator.mean
+
+
+def resolutionTerm(size, cv=None):
+    """Return the nominal_resolution term for a mean cell size in km"""
+    if cv is None:
+        cv = getCV('nominal_resolution')
+    for upper, term in resolutionBins:
+        if size < upper:
+            if term not in cv:
+                raise KeyError(' '.join(['nominal_resolution term missing from the CV:', term]))
+            return term
+    raise ValueError(' '.join(['Invalid cell size:', str(size)]))
+
+
+def loadGrid(fileName):
+    """Return (latBounds, lonBounds, areas) from an .npz of CMIP named arrays, None where absent
+
+    Bounds are read from lat_bnds/lon_bnds or vertices_latitude/vertices_longitude,
+    else derived from 1-D lat/lon centers; areas from areacella, areacello or cell_area
+    """
+    data = np.load(fileName)
+
+    def first(names):
+        for name in names:
+            if name in data.files:
+                return data[name]
+        return None
+
+    latBounds = first(['lat_bnds', 'lat_bounds', 'vertices_latitude'])
+    lonBounds = first(['lon_bnds', 'lon_bounds', 'vertices_longitude'])
+    if latBounds is None and 'lat' in data.files and 'lon' in data.files and data['lat'].ndim == 1:
+        latBounds, lonBounds = np.clip(boundsFromCenters(data['lat']), -90, 90), boundsFromCenters(data['lon'])
+    areas = first(['areacella', 'areacello', 'cell_area'])
+    if areas is not None and latBounds is None:
+        # m2, as written by CMOR, to km2
+        areas = areas / 1e6
+    return latBounds, lonBounds, areas
+
+
+# %% Main
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compute the nominal_resolution of model grids')
+    parser.add_argument('grids', nargs='+', help='.npz files holding grid bounds and/or cell areas')
+    parser.add_argument('--declared', help='nominal_resolution term to verify every grid against')
+    parser.add_argument('--chunk', type=int, default=chunkSize, help='cells processed per chunk')
+    args = parser.parse_args()
+    if args.declared and args.declared not in getCV('nominal_resolution'):
+        parser.error(' '.join(['Not a nominal_resolution term:', args.declared]))
+
+    mismatches = 0
+    for fileName in args.grids:
+        latBounds, lonBounds, areas = loadGrid(fileName)
+        if latBounds is None and areas is None:
+            print('\t'.join([fileName, 'no bounds or cell areas found']), file=sys.stderr)
+            mismatches += 1
+            continue
+        size = meanCellSize(latBounds, lonBounds, areas, args.chunk)
+        term = resolutionTerm(size)
+        fields = [fileName, '{:.3f} km'.format(size), term]
+        if args.declared:
+            fields.append('ok' if term == args.declared else ' '.join(['declared', args.declared]))
+            mismatches += term != args.declared
+        print('\t'.join(fields))
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 23:05:44 2026
+
+agent 17th October 2026
+
+This module instruments the named stages of the writeJson.py pipeline. Each
+stage, optionally for one target CV, is run inside StageProfiler.stage(),
+which records:
+
+    wall            elapsed time, time.perf_counter (s)
+    cpu             CPU time, time.process_time, or time.thread_time in worker threads (s)
+    peakBytes       peak traced allocation above the stage's starting level,
+                    when tracemalloc is tracing (main thread stages only)
+    bytesWritten    bytes the stage reports writing
+    files           files the stage reports writing
+    calls           {counter: increase}, e.g. gitCalls from gitMetadata.gitCallCount
+                    (main thread stages only)
+
+The stage body updates bytesWritten and files on the record it is given.
+Hooks, callables added with addHook, are called with ('start', record) and
+('end', record) for every stage, and report() returns all records with totals
+per stage and per target:
+
+    profiler = pipelineProfile.StageProfiler(trace=True)
+    profiler.addCounter('gitCalls', lambda: gitMetadata.gitCallCount)
+    with profiler.stage('write', 'experiment_id') as record:
+        record['bytesWritten'] += writeAtomic(outFile, data)
+    profiler.writeReport('profile.json')
+
+tracemalloc slows allocation heavy stages, so wall and CPU times of a traced run
+overstate an untraced one. The traced peak is reset at every stage boundary and
+carried into the enclosing stages, so nested stages each report their own peak
+"""
+"""
+agent 17 Oct 2026   - Started
+
+@author: agent
+"""
+
+# %% imports
+import contextlib
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+
+
+# %% Functions
+class StageProfiler(object):
+    """Record wall time, CPU time, peak allocation, output and external call counts per stage
+
+    Parameters
+    ----------
+    trace : bool, optional
+        Start tracemalloc to record peak allocations, stopped by close()
+    """
+
+    def __init__(self, trace=False):
+        self.records = []
+        self.hooks = []
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.started = time.perf_counter()
+        self.tracing = trace and not tracemalloc.is_tracing()
+        if self.tracing:
+            tracemalloc.start()
+
+    def addHook(self, hook):
+        """Call hook(event, record) at the 'start' and 'end' of every stage"""
+        self.hooks.append(hook)
+
+    def addCounter(self, name, read):
+        """Record the increase of read(), e.g. an external call count, across main thread stages"""
+        self.counters[name] = read
+
+    def stack(self):
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        return self.local.stack
+
+    @contextlib.contextmanager
+    def stage(self, name, target=None, parent=None):
+        """Profile the enclosed block as stage name, for target when given; yields the stage record
+
+        parent names the enclosing stage for stages run in worker threads,
+        otherwise it is the innermost open stage of the calling thread
+        """
+        mainThread = threading.current_thread() is threading.main_thread()
+        cpuClock = time.process_time if mainThread else time.thread_time
+        stack = self.stack()
+        if parent is None and stack:
+            parent = stack[-1]['stage']
+        record = {'stage': name, 'target': target, 'parent': parent,
+                  'thread': threading.current_thread().name, 'bytesWritten': 0, 'files': 0}
+        for hook in self.hooks:
+            hook('start', record)
+        tracing = mainThread and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            # Carry the peak so far into the open stages before resetting it for this one
+            for frame in stack:
+                frame['_peak'] = max(frame['_peak'], peak)
+            tracemalloc.reset_peak()
+            record['_base'] = record['_peak'] = current
+        counts = dict((counter, read()) for counter, read in self.counters.items()) if mainThread else None
+        stack.append(record)
+        start = time.perf_counter()
+        cpuStart = cpuClock()
+        try:
+            yield record
+        finally:
+            record['wall'] = time.perf_counter() - start
+            record['cpu'] = cpuClock() - cpuStart
+            record['start'] = start - self.started
+            stack.pop()
+            if tracing:
+                peak = max(record.pop('_peak'), tracemalloc.get_traced_memory()[1])
+                record['peakBytes'] = peak - record.pop('_base')
+                if stack and '_peak' in stack[-1]:
+                    stack[-1]['_peak'] = max(stack[-1]['_peak'], peak)
+                tracemalloc.reset_peak()
+            else:
+                record['peakBytes'] = None
+            record['calls'] = dict((counter, read() - counts[counter])
+                                   for counter, read in self.counters.items()) if counts is not None else {}
+            with self.lock:
+                self.records.append(record)
+            for hook in self.hooks:
+                hook('end', record)
+
+    def close(self):
+        """Stop tracemalloc when started by this profiler"""
+        if self.tracing:
+            tracemalloc.stop()
+            self.tracing = False
+
+    def report(self):
+        """Return {'stages': records in start order, 'totals': per stage, 'targets': per target}"""
+        with self.lock:
+            records = sorted(self.records, key=lambda record: record['start'])
+
+        def total(group):
+            peaks = [record['peakBytes'] for record in group if record['peakBytes'] is not None]
+            calls = {}
+            for record in group:
+                for counter, count in record['calls'].items():
+                    calls[counter] = calls.get(counter, 0) + count
+            return {'count': len(group), 'wall': sum(record['wall'] for record in group),
+                    'cpu': sum(record['cpu'] for record in group),
+                    'peakBytes': max(peaks) if peaks else None,
+                    'bytesWritten': sum(record['bytesWritten'] for record in group),
+                    'files': sum(record['files'] for record in group), 'calls': calls}
+
+        stages, targets = {}, {}
+        for record in records:
+            stages.setdefault(record['stage'], []).append(record)
+            if record['target'] is not None:
+                targets.setdefault(record['target'], {}).setdefault(record['stage'], []).append(record)
+        return {'python': platform.python_version(), 'platform': platform.platform(),
+                'argv': sys.argv, 'cpuCount': os.cpu_count(), 'tracemalloc': any(
+                    record['peakBytes'] is not None for record in records),
+                'wall': time.perf_counter() - self.started, 'stages': records,
+                'totals': dict((name, total(group)) for name, group in stages.items()),
+                'targets': dict((target, dict((name, total(group)) for name, group in targetStages.items()))
+                                for target, targetStages in targets.items())}
+
+    def writeReport(self, fileName):
+        """Write report() as json"""
+        with open(fileName, 'w') as fH:
+            json.dump(self.report(), fH, ensure_ascii=True, sort_keys=True, indent=4, separators=(',', ':'))
+        return fileName
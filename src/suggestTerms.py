@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 13:35:52 2026
+
+agent 17th October 2026
+
+This module suggests the closest valid CV terms for an invalid facet value,
+e.g. rcp8.5 -> rcp85, CSIRO_ARCCSS -> CSIRO-ARCCSS. Each CV is indexed once:
+
+    - values are normalized (lower case, punctuation and whitespace removed),
+      so case and separator variants resolve by a single dict lookup
+    - otherwise candidates are gathered from a character trigram inverted
+      index and only the best-overlapping few are ranked by edit distance,
+      rather than computing edit distance against every term
+    - results for non-exact values are kept per index in a least recently
+      used cache of cacheSize entries
+
+    import suggestTerms
+    suggestTerms.suggest('experiment_id', 'RCP8.5')    # [('rcp85', 0)]
+"""
+"""
+agent 17 Oct 2026   - Started
+
+@author: agent
+"""
+
+# %% imports
+import collections
+import re
+from cmip5CVs import getCV, masterTargets
+
+# %% Settings
+# Candidates ranked by edit distance, after trigram overlap
+candidateCount = 8
+# Non-exact results kept per index, least recently used evicted first
+cacheSize = 4096
+_nonAlphanumeric = re.compile(r'[^0-9a-z]+')
+_indexes = {}
+
+
+# %% Functions
+def normalize(value):
+    """Return value lower cased with all non-alphanumeric characters removed"""
+    return _nonAlphanumeric.sub('', value.lower())
+
+
+def trigrams(value):
+    """Return the set of padded character trigrams of a normalized value"""
+    padded = ''.join(['  ', value, ' '])
+    return set(padded[ind:ind + 3] for ind in range(len(padded) - 2))
+
+
+def editDistance(a, b, bound=None):
+    """Return the Levenshtein distance between two strings
+
+    With bound, stops early and returns bound + 1 once the distance is known
+    to exceed bound
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if bound is not None and len(a) - len(b) > bound:
+        return bound + 1
+    previous = list(range(len(b) + 1))
+    for ind, charA in enumerate(a, 1):
+        current = [ind]
+        for jnd, charB in enumerate(b, 1):
+            current.append(min(previous[jnd] + 1, current[jnd - 1] + 1,
+                               previous[jnd - 1] + (charA != charB)))
+        if bound is not None and min(current) > bound:
+            return bound + 1
+        previous = current
+    return previous[-1]
+
+
+class SuggestionIndex(object):
+    """Nearest-term index over the terms of one CV"""
+
+    def __init__(self, terms, cacheSize=cacheSize):
+        self.terms = list(terms)
+        self.normalized = collections.defaultdict(list)
+        self.postings = collections.defaultdict(list)
+        for ind, term in enumerate(self.terms):
+            norm = normalize(term)
+            self.normalized[norm].append(ind)
+            for gram in trigrams(norm):
+                self.postings[gram].append(ind)
+        self.normTerms = [normalize(term) for term in self.terms]
+        # Bad values repeat heavily within a publication batch; bounded, as values are unbounded
+        self.cache = collections.OrderedDict()
+        self.cacheSize = cacheSize
+
+    def suggest(self, value, k=3):
+        """Return up to k (term, distance) pairs, closest first
+
+        distance is the edit distance between the normalized forms, so 0
+        means value differs from term only by case or punctuation
+        """
+        norm = normalize(value)
+        exact = self.normalized.get(norm)
+        if exact:
+            return [(self.terms[ind], 0) for ind in exact[:k]]
+        key = (norm, k)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        suggestions = self.cache[key] = self.rank(norm, k)
+        if len(self.cache) > self.cacheSize:
+            self.cache.popitem(last=False)
+        return suggestions
+
+    def rank(self, norm, k):
+        """Return the k closest terms to a normalized value with no exact match"""
+        overlap = collections.Counter()
+        for gram in trigrams(norm):
+            for ind in self.postings.get(gram, ()):
+                overlap[ind] += 1
+        candidates = [ind for ind, _ in overlap.most_common(candidateCount)]
+        # Rank candidates by edit distance, bounded by the current k-th best
+        ranked = []
+        for ind in candidates:
+            bound = ranked[k - 1][0] if len(ranked) >= k else None
+            distance = editDistance(norm, self.normTerms[ind], bound)
+            if bound is None or distance <= bound:
+                ranked.append((distance, -overlap[ind], self.terms[ind]))
+                ranked.sort()
+        return [(term, distance) for distance, _, term in ranked[:k]]
+
+
+def getIndex(cvName):
+    """Return the SuggestionIndex for a CV, built on first use"""
+    if cvName not in _indexes:
+        _indexes[cvName] = SuggestionIndex(getCV(cvName))
+    return _indexes[cvName]
+
+
+def buildIndexes(cvNames=masterTargets):
+    """Build the indexes for all available CVs, returning {cvName: SuggestionIndex}"""
+    for cvName in cvNames:
+        try:
+            getIndex(cvName)
+        except (IOError, OSError):
+            # CV not (yet) generated
+            pass
+    return dict((cvName, _indexes[cvName]) for cvName in cvNames if cvName in _indexes)
+
+
+def suggest(cvName, value, k=3):
+    """Return up to k (term, distance) suggestions for value from a CV"""
+    return getIndex(cvName).suggest(value, k)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 22:58:12 2026
+
+agent 17th October 2026
+
+Tests for checkGlobalAttributes.py: readGlobalAttributes over handcrafted
+netCDF classic (CDF1), 64-bit offset (CDF2) and 64-bit data (CDF5) headers
+
+    python -m pytest test_checkGlobalAttributes.py
+"""
+"""
+agent 17 Oct 2026   - Started
+
+@author: agent
+"""
+
+# %% imports
+import struct
+import pytest
+from checkGlobalAttributes import AttributeChecker, readGlobalAttributes, ncAttribute, ncDimension
+
+
+# %% Functions
+def ncHeader(version, dims, attributes, absent=False):
+    """Return the bytes of a netCDF classic header with no variables
+
+    dims is [(name, length)], attributes [(name, nc_type, typeCode, values)],
+    values a str for NC_CHAR. With absent, the global attribute list is
+    written as ABSENT (ZERO ZERO) and attributes is ignored
+    """
+    count = '>Q' if version == 5 else '>I'
+
+    def padded(data):
+        return data + b'\x00' * (-len(data) % 4)
+
+    def name(value):
+        return struct.pack(count, len(value)) + padded(value.encode('utf-8'))
+
+    header = b'CDF' + bytes([version]) + struct.pack(count, 0)
+    if dims:
+        header += struct.pack('>I', ncDimension) + struct.pack(count, len(dims))
+        for dimName, length in dims:
+            header += name(dimName) + struct.pack(count, length)
+    else:
+        header += struct.pack('>I', 0) + struct.pack(count, 0)
+    if absent:
+        header += struct.pack('>I', 0) + struct.pack(count, 0)
+    else:
+        header += struct.pack('>I', ncAttribute) + struct.pack(count, len(attributes))
+        for attributeName, ncType, typeCode, values in attributes:
+            if typeCode == 'c':
+                data = values.encode('utf-8')
+                valueCount = len(data)
+            else:
+                data = struct.pack(''.join(['>', str(len(values)), typeCode]), *values)
+                valueCount = len(values)
+            header += name(attributeName) + struct.pack('>I', ncType) + struct.pack(count, valueCount)
+            header += padded(data)
+    # Variable list, ABSENT
+    return header + struct.pack('>I', 0) + struct.pack(count, 0)
+
+
+def writeFile(tmp_path, data, fileName='test.nc'):
+    path = tmp_path / fileName
+    path.write_bytes(data)
+    return str(path)
+
+
+attributes = [
+    ('experiment_id', 2, 'c', 'historical'),
+    ('table_id', 2, 'c', 'Table Amon (26 July 2011) 976b7fd1d9e1be31dddd28f5dc79b7a1'),
+    ('realization', 4, 'i', [1]),
+    ('forcing_years', 6, 'd', [1850.0, 2005.0]),
+]
+
+
+# %% Tests
+@pytest.mark.parametrize('version', [1, 2, 5])
+def test_attributes_round_trip(tmp_path, version):
+    fileName = writeFile(tmp_path, ncHeader(version, [('time', 0), ('lat', 96)], attributes))
+    result = readGlobalAttributes(fileName)
+    assert result == {'experiment_id': 'historical',
+                      'table_id': 'Table Amon (26 July 2011) 976b7fd1d9e1be31dddd28f5dc79b7a1',
+                      'realization': 1, 'forcing_years': (1850.0, 2005.0)}
+
+
+def test_cdf5_64bit_counts(tmp_path):
+    # A dimension longer than 2**32 only fits a CDF5 (64-bit) count
+    unsigned = [('valid_max', 11, 'Q', [2 ** 40]), ('source', 2, 'c', 'GISS-E2-R')]
+    fileName = writeFile(tmp_path, ncHeader(5, [('ncells', 2 ** 33)], unsigned))
+    assert readGlobalAttributes(fileName) == {'valid_max': 2 ** 40, 'source': 'GISS-E2-R'}
+
+
+@pytest.mark.parametrize('version', [1, 5])
+def test_absent_attribute_list(tmp_path, version):
+    fileName = writeFile(tmp_path, ncHeader(version, [('time', 0)], [], absent=True))
+    assert readGlobalAttributes(fileName) == {}
+
+
+@pytest.mark.parametrize('version', [1, 5])
+def test_empty_attribute_list(tmp_path, version):
+    fileName = writeFile(tmp_path, ncHeader(version, [], []))
+    assert readGlobalAttributes(fileName) == {}
+
+
+def test_unsupported_files(tmp_path):
+    with pytest.raises(ValueError, match='HDF5'):
+        readGlobalAttributes(writeFile(tmp_path, b'\x89HDF\r\n\x1a\n' + b'\x00' * 64))
+    with pytest.raises(ValueError, match='Not a netCDF'):
+        readGlobalAttributes(writeFile(tmp_path, b'CDF\x03' + b'\x00' * 16))
+    with pytest.raises(ValueError, match='Truncated'):
+        readGlobalAttributes(writeFile(tmp_path, ncHeader(1, [], attributes)[:60]))
+
+
+def test_checker():
+    checker = AttributeChecker(['experiment_id', 'institute_id'],
+                               {'experiment_id': ['historical'], 'table_id': ['Amon']})
+    assert checker.check({'experiment_id': 'historical', 'table_id': 'Table Amon (26 July 2011)',
+                          'institute_id': ' '}) == [('empty', 'institute_id')]
+    assert checker.check({'experiment_id': 'rcp8.5'}) == [('missing', 'institute_id'),
+                                                          ('experiment_id', 'rcp8.5')]
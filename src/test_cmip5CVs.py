@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 23:12:40 2026
+
+agent 17th October 2026
+
+Tests for cmip5CVs.py: marshal snapshot write and read, the json fallback for
+stale records, freezing, writeAtomic and the append-only facet code registry
+
+    python -m pytest test_cmip5CVs.py
+"""
+"""
+agent 17 Oct 2026   - Started
+
+@author: agent
+"""
+
+# %% imports
+import json
+import os
+import types
+import pytest
+import cmip5CVs
+from cmip5CVs import freeze, getFacetCodes, getFileName, loadCV, updateFacetCodes, writeAtomic, writeSnapshot
+
+
+# %% Functions
+def writeJsonCV(path, cvName, cv):
+    with open(getFileName(cvName, str(path)), 'w') as fH:
+        json.dump({cvName: cv}, fH)
+
+
+realm = {'atmos': 'Atmosphere', 'ocean': 'Ocean'}
+constraints = {'Amon': {'frequency': ['mon'], 'realm': ['atmos']}}
+
+
+# %% Tests
+def test_snapshot_round_trip(tmp_path):
+    writeJsonCV(tmp_path, 'realm', realm)
+    writeJsonCV(tmp_path, 'mip_era', ['CMIP3'])
+    writeJsonCV(tmp_path, 'table_id_constraints', constraints)
+    snapshotFile = writeSnapshot({'realm': realm, 'mip_era': ['CMIP3'], 'table_id_constraints': constraints},
+                                 str(tmp_path))
+    assert os.path.basename(snapshotFile) == cmip5CVs.snapshotName
+    index, _ = cmip5CVs.readSnapshotIndex(str(tmp_path))
+    assert sorted(index) == ['mip_era', 'realm', 'table_id_constraints']
+    assert loadCV('realm', str(tmp_path)) == realm
+    assert loadCV('mip_era', str(tmp_path)) == ['CMIP3']
+    assert loadCV('table_id_constraints', str(tmp_path)) == constraints
+
+
+def test_snapshot_preferred_to_json(tmp_path):
+    # Snapshot content differing from the json shows which one was read
+    writeJsonCV(tmp_path, 'realm', realm)
+    writeSnapshot({'realm': {'atmos': 'From snapshot'}}, str(tmp_path))
+    assert loadCV('realm', str(tmp_path)) == {'atmos': 'From snapshot'}
+
+
+def test_snapshot_without_json(tmp_path):
+    # With no json files (e.g. --formats marshal), the records are used while the json stays absent
+    writeSnapshot({'realm': realm}, str(tmp_path))
+    assert loadCV('realm', str(tmp_path)) == realm
+    writeJsonCV(tmp_path, 'realm', {'atmos': 'From json'})
+    assert loadCV('realm', str(tmp_path)) == {'atmos': 'From json'}
+
+
+def test_stale_record_falls_back_to_json(tmp_path):
+    writeJsonCV(tmp_path, 'realm', realm)
+    writeSnapshot({'realm': realm}, str(tmp_path))
+    updated = dict(realm, seaIce='Sea Ice')
+    writeJsonCV(tmp_path, 'realm', updated)
+    assert loadCV('realm', str(tmp_path)) == updated
+
+
+def test_missing_record_falls_back_to_json(tmp_path):
+    writeJsonCV(tmp_path, 'realm', realm)
+    writeJsonCV(tmp_path, 'frequency', ['mon'])
+    writeSnapshot({'realm': realm}, str(tmp_path))
+    assert loadCV('frequency', str(tmp_path)) == ['mon']
+
+
+def test_freeze():
+    frozen = freeze(constraints)
+    assert isinstance(frozen, types.MappingProxyType)
+    assert isinstance(frozen['Amon'], types.MappingProxyType)
+    assert frozen['Amon']['realm'] == ('atmos',)
+    with pytest.raises(TypeError):
+        frozen['Amon']['realm'] = ['ocean']
+
+
+def test_writeAtomic(tmp_path):
+    fileName = str(tmp_path / 'out.bin')
+    assert writeAtomic(fileName, b'abc') == 3
+    assert writeAtomic(fileName, lambda fH: fH.write(b'defg')) == 4
+    with open(fileName, 'rb') as fH:
+        assert fH.read() == b'defg'
+
+    def fail(fH):
+        fH.write(b'partial')
+        raise RuntimeError('write failed')
+
+    with pytest.raises(RuntimeError):
+        writeAtomic(fileName, fail)
+    with open(fileName, 'rb') as fH:
+        assert fH.read() == b'defg'
+    assert os.listdir(str(tmp_path)) == ['out.bin']
+
+
+def test_facet_codes_append_only(tmp_path):
+    codesFile = str(tmp_path / 'facetCodes.json')
+    assert updateFacetCodes({'realm': ['ocean', 'atmos']}, codesFile) == {'realm': ['ocean', 'atmos']}
+    # Existing codes are kept when terms are removed or reordered, new terms are appended
+    assert updateFacetCodes({'realm': ['atmos', 'seaIce']}, codesFile) == {'realm': ['seaIce']}
+    assert updateFacetCodes({'realm': ['atmos']}, codesFile) == {}
+    assert getFacetCodes(codesFile)['realm'] == ['ocean', 'atmos', 'seaIce']
+    with open(codesFile) as fH:
+        assert json.load(fH)['realm'] == ['ocean', 'atmos', 'seaIce']
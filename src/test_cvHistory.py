@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 23:41:27 2026
+
+agent 17th October 2026
+
+Tests for cvHistory.py: the term interval index built over the fixture
+repository of conftest.py, whose CVs change across commits of src/writeJson.py
+
+    python -m pytest test_cvHistory.py
+"""
+"""
+agent 17 Oct 2026   - Started
+
+@author: agent
+"""
+
+# %% imports
+import pytest
+from cmip5CVs import readDefinitions
+from cvHistory import CVHistory
+from conftest import sources
+
+# %% Fixtures
+@pytest.fixture(scope='module')
+def history(repo):
+    return CVHistory(repo[0], cacheFile=None)
+
+
+# %% Tests
+def test_versions(repo, history):
+    _, hashes = repo
+    assert [version['hash'] for version in history.versions] == [hashes[0], hashes[1], hashes[3]]
+    assert history.versions[1]['cvs'] == ['experiment_id']
+    assert sorted(history.versions[2]['cvs']) == ['experiment_id', 'realm']
+
+
+def test_head(history):
+    assert history.termsAt('realm') == {'atmos', 'ocean', 'seaIce'}
+    assert history.isValid('experiment_id', 'rcp85')
+    assert not history.isValid('realm', 'land')
+
+
+def test_as_of(repo, history):
+    _, hashes = repo
+    assert history.isValid('experiment_id', 'esmFixClim1', asOf=hashes[0])
+    assert not history.isValid('experiment_id', 'esmFixClim1', asOf='v1.0.0')
+    # A commit that did not change the CVs resolves to the version before it
+    assert not history.isValid('experiment_id', 'esmFixClim1', asOf=hashes[2][:10])
+    assert history.isValid('experiment_id', 'esmFixClim1', asOf=hashes[3])
+    assert not history.isValid('experiment_id', 'rcp85', asOf='2020-06-01')
+    assert history.isValid('experiment_id', 'rcp85', asOf='2021-06-01')
+    assert history.termsAt('realm', asOf='2019-01-01') == set()
+
+
+def test_diff_and_term_history(repo, history):
+    _, hashes = repo
+    assert history.diff('experiment_id', hashes[0], 'v1.0.0') == ({'rcp85'}, {'esmFixClim1'})
+    spans = history.termHistory('experiment_id', 'esmFixClim1')
+    assert [(start['hash'], end['hash'] if end else None) for start, end in spans] == \
+        [(hashes[0], hashes[1]), (hashes[3], None)]
+
+
+def test_readDefinitions():
+    cvs = readDefinitions(sources[3][1] + "frequency = sorted(['mon', 'day'])\n")
+    assert cvs == {'realm': {'atmos': 'Atmosphere', 'ocean': 'Ocean', 'seaIce': 'Sea Ice'},
+                   'experiment_id': ['historical', 'rcp85', 'esmFixClim1']}
+    assert readDefinitions('realm = {') == {}
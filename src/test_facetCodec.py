@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 23:24:18 2026
+
+agent 17th October 2026
+
+Tests for facetCodec.py: facet encoding against a fixed registry and columnar
+catalog round trips, including a catalog with zero rows
+
+    python -m pytest test_facetCodec.py
+"""
+"""
+agent 17 Oct 2026   - Started
+
+@author: agent
+"""
+
+# %% imports
+import numpy as np
+import pytest
+from facetCodec import Catalog, FacetCodec, codeDtype, writeCatalog
+
+# %% Settings
+codes = {'institution_id': ['NASA-GISS', 'NCAR', 'MOHC'], 'realm': ['atmos', 'ocean']}
+
+
+# %% Tests
+def test_encode_decode():
+    codec = FacetCodec(codes)
+    encoded = codec.encode('institution_id', ['NCAR', None, 'MOHC', 'unknown'])
+    assert encoded.dtype == np.uint8
+    assert encoded.tolist() == [2, 0, 3, 0]
+    assert codec.decode('institution_id', encoded).tolist() == ['NCAR', None, 'MOHC', None]
+    with pytest.raises(ValueError, match='unknown'):
+        codec.encode('institution_id', ['NCAR', 'unknown'], strict=True)
+    with pytest.raises(KeyError):
+        codec.encode('source_id', ['GISS-E2-R'])
+
+
+@pytest.mark.parametrize('termCount, dtype', [(0, np.uint8), (255, np.uint8), (256, np.uint16),
+                                              (65535, np.uint16), (65536, np.uint32)])
+def test_codeDtype(termCount, dtype):
+    # Codes run from missingCode 0 to termCount
+    assert codeDtype(termCount) == dtype
+
+
+def test_catalog_round_trip(tmp_path):
+    codec = FacetCodec(codes)
+    fileName = writeCatalog(str(tmp_path / 'catalog.cmip5cat'), {
+        'institution_id': ['NASA-GISS', 'NCAR', None, 'NCAR'],
+        'realm': ['atmos', 'ocean', 'ocean', 'atmos'],
+        'size': np.array([10, 20, 30, 40], dtype=np.int64),
+        'path': ['a.nc', 'bb.nc', 'ccc.nc', 'd.nc'],
+    }, codec)
+    catalog = Catalog(fileName, codec)
+    assert len(catalog) == 4
+    assert catalog.column('institution_id').tolist() == ['NASA-GISS', 'NCAR', None, 'NCAR']
+    assert catalog.column('size').tolist() == [10, 20, 30, 40]
+    assert catalog.column('path').tolist() == ['a.nc', 'bb.nc', 'ccc.nc', 'd.nc']
+    assert catalog.countBy('institution_id') == {'NASA-GISS': 1, 'NCAR': 2, None: 1}
+    assert catalog.countBy('realm', catalog.column('size') > 15) == {'ocean': 2, 'atmos': 1}
+    for name in ('institution_id', 'realm', 'size'):
+        assert catalog.codes(name).ctypes.data % 64 == 0
+
+
+def test_catalog_zero_rows(tmp_path):
+    codec = FacetCodec(codes)
+    fileName = writeCatalog(str(tmp_path / 'empty.cmip5cat'), {
+        'institution_id': [], 'size': np.zeros(0, dtype=np.int64)}, codec)
+    catalog = Catalog(fileName, codec)
+    assert len(catalog) == 0
+    assert catalog.column('institution_id').tolist() == []
+    assert catalog.column('size').dtype == np.int64
+    assert catalog.countBy('institution_id') == {}
+
+
+def test_catalog_codes_beyond_registry(tmp_path):
+    fileName = writeCatalog(str(tmp_path / 'catalog.cmip5cat'), {'realm': ['atmos', 'ocean']},
+                            FacetCodec(codes))
+    with pytest.raises(ValueError, match='registry'):
+        Catalog(fileName, FacetCodec({'realm': ['atmos']}))
+    # Codes are append-only, a longer registry still decodes the catalog
+    catalog = Catalog(fileName, FacetCodec({'realm': ['atmos', 'ocean', 'seaIce']}))
+    assert catalog.column('realm').tolist() == ['atmos', 'ocean']
+
+
+def test_column_lengths_differ(tmp_path):
+    with pytest.raises(ValueError, match='length'):
+        writeCatalog(str(tmp_path / 'catalog.cmip5cat'), {'realm': ['atmos'], 'size': [1, 2]},
+                     FacetCodec(codes))
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 23:58:30 2026
+
+agent 17th October 2026
+
+Tests for gitMetadata.py over the fixture repository of conftest.py: the
+history walk, the CV versions of writeJson.py and the per-CV last commit
+
+    python -m pytest test_gitMetadata.py
+"""
+"""
+agent 17 Oct 2026   - Started
+
+@author: agent
+"""
+
+# %% imports
+from cmip5CVs import getCVHash
+from gitMetadata import GitMetadata
+
+
+# %% Tests
+def test_history(repo):
+    path, hashes = repo
+    metadata = GitMetadata(path, cacheFile=None)
+    assert metadata.head == metadata.commits[0]['hash']
+    assert [commit['hash'] for commit, _ in metadata.readCVVersions()] == hashes
+    assert metadata.getFileHistory('/'.join([path, 'src', 'writeJson.py']))['previous_commit'] == hashes[4]
+
+
+def test_cv_history(repo):
+    path, hashes = repo
+    metadata = GitMetadata(path, cacheFile=None)
+    # The last change to the CV, not the last commit of the file
+    realm = metadata.getCVHistory('realm', getCVHash({'atmos': 'Atmosphere', 'ocean': 'Ocean',
+                                                      'seaIce': 'Sea Ice'}))
+    assert realm['previous_commit'] == hashes[3]
+    assert realm['commitMessage'] == 'Version 3'
+    # Uncommitted changes and CVs never committed have no commit
+    assert metadata.getCVHistory('realm', getCVHash({'atmos': 'Atmosphere'})) == {}
+    assert metadata.getCVHistory('frequency', getCVHash(['mon'])) == {}
+
+
+def test_cache(repo, tmp_path):
+    path, hashes = repo
+    cacheFile = str(tmp_path / 'cache.json')
+    cvHash = getCVHash({'atmos': 'Atmosphere', 'ocean': 'Ocean', 'seaIce': 'Sea Ice'})
+    GitMetadata(path, cacheFile).getCVHistory('realm', cvHash)
+    cached = GitMetadata(path, cacheFile)
+    assert cached.cvCommits is not None
+    assert cached.getCVHistory('realm', cvHash)['previous_commit'] == hashes[3]
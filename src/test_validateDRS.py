@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 23:21:09 2026
+
+agent 17th October 2026
+
+Tests for validateDRS.py: anchoring of the DRS on the activity element, with
+and without --root, and path and filename violations
+
+    python -m pytest test_validateDRS.py
+"""
+"""
+agent 17 Oct 2026   - Started
+
+@author: agent
+"""
+
+# %% imports
+import pytest
+from validateDRS import DRSValidator, Suggester
+
+# %% Settings
+cvs = {
+    'mip_era': ['CMIP3'],
+    'institution_id': ['NASA-GISS', 'CSIRO-ARCCSS'],
+    'experiment_id': ['historical', 'rcp85'],
+    'frequency': ['mon', 'day'],
+    'realm': ['atmos', 'ocean'],
+    'table_id': ['Amon', 'Omon'],
+}
+drs = 'output1/NASA-GISS/GISS-E2-R/historical/mon/atmos/Amon/r1i1p1/v20120101/tas'
+fileName = 'tas_Amon_GISS-E2-R_historical_r1i1p1_185001-200512.nc'
+
+
+# %% Tests
+@pytest.mark.parametrize('activity', ['CMIP5', 'cmip5', 'CMIP3'])
+def test_anchored(activity):
+    validator = DRSValidator(cvs)
+    assert validator.validate('/'.join(['/data', activity, drs, fileName])) == []
+    assert validator.validate('/'.join([activity, drs])) == []
+
+
+def test_unanchored():
+    path = '/'.join(['/data/project', drs, fileName])
+    assert DRSValidator(cvs).validate(path) == [('unanchored', '/'.join(['/data/project', drs]))]
+
+
+def test_root():
+    validator = DRSValidator(cvs, root='/data/')
+    assert validator.validate('/'.join(['/data/cmip5', drs, fileName])) == []
+    assert validator.validate('/'.join(['/data/CMIP2', drs])) == [('mip_era', 'CMIP2')]
+
+
+def test_violations():
+    validator = DRSValidator(cvs)
+    path = '/'.join(['/data/cmip5', drs.replace('historical', 'histrical'),
+                     fileName.replace('Amon', 'Omon')])
+    assert validator.validate(path) == [('experiment_id', 'histrical'), ('filename_mismatch', 'table_id:Omon'),
+                                        ('filename_mismatch', 'experiment_id:historical')]
+    assert validator.validate('/data/cmip5/output1/NASA-GISS') == [('depth', '3')]
+
+
+def test_suggester():
+    suggester = Suggester(cvs, k=1)
+    assert suggester.suggest('mip_era', 'cmip-5') == ['CMIP5']
+    assert suggester.suggest('experiment_id', 'histrical') == ['historical']
+    assert suggester.suggest('model', 'GISS') == []
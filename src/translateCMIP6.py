@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 12:41:33 2026
+
+agent 17th October 2026
+
+This module translates CMIP5 facet values (experiment_id, frequency, table_id,
+grid_label) to their CMIP6 equivalents, and CMIP5 experiment_id values to the
+CMIP6 activity_id that now hosts the experiment. Whole catalog columns are
+translated at once: a column is reduced to its distinct categories and integer
+codes, only the categories are looked up, and the codes are remapped with a
+single NumPy take, so the per-row cost is array indexing rather than Python
+dict lookups
+
+    import translateCMIP6
+    cmip6, unmapped = translateCMIP6.translateColumn('experiment_id', catalog['experiment'])
+
+pandas.Categorical columns are translated from their existing codes and
+returned as pandas.Categorical. Values without a CMIP6 equivalent become
+missing (None, or code -1) and are reported with their row counts
+
+Mappings follow Karl's notes at https://docs.google.com/document/d/1bUwK6G_fVZO53UjLZbQUOuBP47PsT8lqKKhL1pjRnKg/edit
+"""
+"""
+agent 17 Oct 2026   - Started
+
+@author: agent
+"""
+
+# %% imports
+import collections
+import numpy as np
+from cmip5CVs import getCV
+
+# %% CMIP5 to CMIP6 mappings
+# Terms missing from a mapping have no CMIP6 equivalent
+experiment_id = {
+    '1pctCO2': '1pctCO2',
+    'abrupt4xCO2': 'abrupt-4xCO2',
+    'amip': 'amip',
+    'amip4K': 'amip-p4K',
+    'amip4xCO2': 'amip-4xCO2',
+    'amipFuture': 'amip-future4K',
+    'aqua4K': 'aqua-p4K',
+    'aqua4xCO2': 'aqua-4xCO2',
+    'aquaControl': 'aqua-control',
+    'esmControl': 'esm-piControl',
+    'esmFdbk1': '1pctCO2-rad',
+    'esmFixClim1': '1pctCO2-bgc',
+    'esmFixClim2': 'hist-bgc',
+    'esmHistorical': 'esm-hist',
+    'esmrcp85': 'esm-ssp585',
+    'historical': 'historical',
+    'historicalGHG': 'hist-GHG',
+    'historicalNat': 'hist-nat',
+    'lgm': 'lgm',
+    'midHolocene': 'midHolocene',
+    'past1000': 'past1000',
+    'piControl': 'piControl',
+    'rcp26': 'ssp126',
+    'rcp45': 'ssp245',
+    'rcp60': 'ssp460',
+    'rcp85': 'ssp585',
+    'sstClim': 'piClim-control',
+    'sstClim4xCO2': 'piClim-4xCO2',
+    'sstClimAerosol': 'piClim-aer',
+    'sstClimSulfate': 'piClim-SO2',
+}
+
+# CMIP6 activity_id hosting each CMIP5 experiment (see activity_id in writeJson.py)
+activity_id = {
+    '1pctCO2': 'CMIP',
+    'abrupt4xCO2': 'CMIP',
+    'amip': 'CMIP',
+    'amip4K': 'CFMIP',
+    'amip4xCO2': 'CFMIP',
+    'amipFuture': 'CFMIP',
+    'aqua4K': 'CFMIP',
+    'aqua4xCO2': 'CFMIP',
+    'aquaControl': 'CFMIP',
+    'esmControl': 'CMIP',
+    'esmFdbk1': 'C4MIP',
+    'esmFixClim1': 'C4MIP',
+    'esmFixClim2': 'C4MIP',
+    'esmHistorical': 'CMIP',
+    'esmrcp85': 'C4MIP',
+    'historical': 'CMIP',
+    'historicalGHG': 'DAMIP',
+    'historicalNat': 'DAMIP',
+    'lgm': 'PMIP',
+    'midHolocene': 'PMIP',
+    'past1000': 'PMIP',
+    'piControl': 'CMIP',
+    'rcp26': 'ScenarioMIP',
+    'rcp45': 'ScenarioMIP',
+    'rcp60': 'ScenarioMIP',
+    'rcp85': 'ScenarioMIP',
+    'sstClim': 'RFMIP',
+    'sstClim4xCO2': 'RFMIP',
+    'sstClimAerosol': 'RFMIP',
+    'sstClimSulfate': 'AerChemMIP',
+}
+
+# Legacy CMIP5 names; all other frequency, grid_label and table_id CV terms are
+# already CMIP6 names and map to themselves
+frequency = {
+    'monClim': 'monC',
+    'subhr': 'subhrPt',
+}
+
+grid_label = {}
+
+table_id = {
+    'OImon': 'SImon',
+    'aero': 'AERmon',
+    'cf3hr': 'CF3hr',
+    'cfDay': 'CFday',
+    'cfMon': 'CFmon',
+    'cfSites': 'CFsubhr',
+}
+
+# Facet translated -> (mapping, CV whose terms map to themselves or None)
+translations = {
+    'activity_id': (activity_id, None),
+    'experiment_id': (experiment_id, None),
+    'frequency': (frequency, 'frequency'),
+    'grid_label': (grid_label, 'grid_label'),
+    'table_id': (table_id, 'table_id'),
+}
+_mappings = {}
+
+
+# %% Functions
+def getMapping(facet):
+    """Return the complete {CMIP5 term: CMIP6 term} mapping for a facet"""
+    if facet not in _mappings:
+        mapping, identityCV = translations[facet]
+        full = {}
+        if identityCV:
+            full.update((term, term) for term in getCV(identityCV))
+        full.update(mapping)
+        _mappings[facet] = full
+    return _mappings[facet]
+
+
+def unmappedTerms(facet):
+    """Return the CMIP5 CV terms that have no CMIP6 equivalent for a facet"""
+    cvName = 'experiment_id' if facet == 'activity_id' else facet
+    mapping = getMapping(facet)
+    return sorted(term for term in getCV(cvName) if term not in mapping)
+
+
+def translateCodes(facet, categories, codes):
+    """Translate a categorical column given as (categories, integer codes)
+
+    Parameters
+    ----------
+    facet : str
+        One of the keys of translations
+    categories : sequence of str
+        Distinct CMIP5 values, indexed by codes
+    codes : array of int
+        Row codes into categories, -1 for missing
+
+    Returns
+    -------
+    (cmip6Categories, cmip6Codes, unmapped)
+        Sorted distinct CMIP6 values, int32 row codes into them (-1 for
+        missing or unmapped), and {CMIP5 value: row count} for unmapped values
+    """
+    mapping = getMapping(facet)
+    codes = np.asarray(codes)
+    translated = [mapping.get(category) for category in categories]
+    cmip6Categories = np.array(sorted(set(t for t in translated if t is not None)), dtype=object)
+    position = dict((term, ind) for ind, term in enumerate(cmip6Categories))
+    # Category lookup table, with a trailing -1 slot for missing (-1) codes
+    lookup = np.array([position.get(t, -1) for t in translated] + [-1], dtype=np.int32)
+    cmip6Codes = lookup[np.where(codes < 0, len(categories), codes)]
+    unmapped = {}
+    missing = [ind for ind, t in enumerate(translated) if t is None]
+    if missing:
+        counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+        unmapped = dict((categories[ind], int(counts[ind])) for ind in missing if counts[ind])
+    return cmip6Categories, cmip6Codes, unmapped
+
+
+def translateColumn(facet, values):
+    """Translate a whole column of CMIP5 values to CMIP6
+
+    values may be any array-like of str (None for missing) or a pandas.Categorical. Returns
+    (translated, unmapped): a pandas.Categorical for categorical input,
+    otherwise an object ndarray with None where there is no CMIP6 equivalent,
+    and {CMIP5 value: row count} for unmapped values
+    """
+    if hasattr(values, 'categories') and hasattr(values, 'codes'):
+        cmip6Categories, cmip6Codes, unmapped = translateCodes(
+            facet, list(values.categories), values.codes)
+        return type(values).from_codes(cmip6Codes, cmip6Categories), unmapped
+    values = np.asarray(values, dtype=object).ravel()
+    # Factorize with one dict lookup per row, in first seen order; None is missing (-1)
+    position = {None: -1}
+    codes = np.fromiter((position.setdefault(value, len(position) - 1) for value in values),
+                        dtype=np.int32, count=len(values))
+    del position[None]
+    cmip6Categories, cmip6Codes, unmapped = translateCodes(facet, list(position), codes)
+    translated = np.append(cmip6Categories, None).astype(object)[cmip6Codes]
+    return translated, unmapped
+
+
+def translateColumns(columns):
+    """Translate several columns, {facet: values}, returning ({facet: translated}, {facet: unmapped})"""
+    translated = {}
+    unmapped = collections.OrderedDict()
+    for facet, values in columns.items():
+        translated[facet], unmapped[facet] = translateColumn(facet, values)
+    return translated, unmapped
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 10:02:18 2026
+
+agent 17th October 2026
+
+This script validates CMIP5 Data Reference Syntax (DRS) directory paths and
+filenames against the controlled vocabulary (CV) json files generated by
+writeJson.py. Each CV is compiled once into a per-facet set, paths are read as
+a stream from files or stdin and validated in batches across a process pool
+
+DRS directory structure (https://pcmdi.llnl.gov/mips/cmip5/docs/cmip5_data_reference_syntax.pdf?id=37):
+    <activity>/<product>/<institute>/<model>/<experiment>/<frequency>/<modeling_realm>/<MIP_table>/<ensemble_member>/<version>/<variable_name>/
+DRS filename:
+    <variable_name>_<MIP_table>_<model>_<experiment>_<ensemble_member>[_<temporal_subset>][_<geographical_info>].nc
+
+Usage:
+    find /data/cmip5 -name '*.nc' | python validateDRS.py
+    find /data/CMIP5 -name '*.nc' | python validateDRS.py --root /data
+    python validateDRS.py listing1.txt listing2.txt --report violations.json
+"""
+"""
+agent 17 Oct 2026   - Started
+agent 17 Oct 2026   - Read CVs through cmip5CVs (marshal snapshot when present)
+agent 17 Oct 2026   - Added nearest valid term suggestions for invalid CV values
+agent 17 Oct 2026   - Activity anchor matched in any case; unanchored paths reported as one violation
+
+@author: agent
+"""
+
+# %% imports
+import argparse
+import collections
+import itertools
+import json
+import multiprocessing
+import re
+import sys
+from cmip5CVs import cvPath, loadCV
+from suggestTerms import SuggestionIndex
+
+# %% Settings
+# Project name in the DRS activity element, accepted alongside the mip_era CV in any case
+# (ESGF and replica trees use cmip5/output1/...)
+project = 'CMIP5'
+# DRS directory elements, in order, and the CV used to validate each (None - pattern only)
+drsFacets = [
+    ('mip_era', 'mip_era'),
+    ('product', None),
+    ('institution_id', 'institution_id'),
+    ('model', None),
+    ('experiment_id', 'experiment_id'),
+    ('frequency', 'frequency'),
+    ('realm', 'realm'),
+    ('table_id', 'table_id'),
+    ('ensemble_member', None),
+    ('version', None),
+    ('variable', None),
+]
+drsPatterns = {
+    'product': re.compile(r'output[12]?$'),
+    'ensemble_member': re.compile(r'r\d+i\d+p\d+$'),
+    'version': re.compile(r'v\d+$'),
+}
+batchSize = 20000
+
+
+# %% Functions
+def loadCVs(path=cvPath):
+    """Read the generated CVs and return {cvName: set of terms}"""
+    return dict((cvName, set(loadCV(cvName, path))) for cvName in set([cv for _, cv in drsFacets if cv]))
+
+
+class DRSValidator(object):
+    """Validate DRS paths against per-facet term sets compiled from the CVs
+
+    Parameters
+    ----------
+    cvs : dict
+        {cvName: iterable of valid terms}, as returned by loadCVs
+    root : str, optional
+        Prefix stripped from each path before validation. Without it the DRS
+        is anchored on the first path element that is a valid activity, in any
+        case; paths with no such element fail as unanchored
+    """
+
+    def __init__(self, cvs, root=None):
+        self.root = root.rstrip('/') + '/' if root else None
+        self.facetSets = {}
+        for facet, cvName in drsFacets:
+            if cvName:
+                self.facetSets[facet] = frozenset(cvs[cvName])
+        self.facetSets['mip_era'] = self.facetSets['mip_era'] | frozenset([project])
+        self.activities = frozenset(term.lower() for term in self.facetSets['mip_era'])
+        # Ordered (index, facet, set or None, pattern or None) checks for the directory elements
+        self.checks = [(ind, facet, self.facetSets.get(facet), drsPatterns.get(facet))
+                       for ind, (facet, _) in enumerate(drsFacets)]
+
+    def splitPath(self, path):
+        """Return (directory elements starting at the activity, filename or None)
+
+        The directory elements are None when no root is set and no element is an activity
+        """
+        if self.root and path.startswith(self.root):
+            path = path[len(self.root):]
+        parts = path.strip('/').split('/')
+        fileName = parts.pop() if parts[-1].endswith('.nc') else None
+        if not self.root:
+            for ind, part in enumerate(parts):
+                if part.lower() in self.activities:
+                    return parts[ind:], fileName
+            return None, fileName
+        return parts, fileName
+
+    def validate(self, path):
+        """Return a list of (facet, value) violations for one path, empty when valid"""
+        parts, fileName = self.splitPath(path)
+        if parts is None:
+            # Elements at unknown positions would each be reported against the wrong facet
+            return [('unanchored', path.rsplit('/', 1)[0] if fileName else path)]
+        violations = []
+        if len(parts) != len(drsFacets):
+            violations.append(('depth', str(len(parts))))
+        for ind, facet, terms, pattern in self.checks:
+            if ind >= len(parts):
+                break
+            value = parts[ind]
+            if facet == 'mip_era':
+                if value not in terms and value.lower() != project.lower():
+                    violations.append((facet, value))
+            elif terms is not None:
+                if value not in terms:
+                    violations.append((facet, value))
+            elif pattern is not None and not pattern.match(value):
+                violations.append((facet, value))
+        if fileName:
+            violations.extend(self.validateFileName(fileName, parts))
+        return violations
+
+    def validateFileName(self, fileName, parts):
+        """Return violations for a DRS filename, cross-checked against its directory"""
+        fields = fileName[:-3].split('_')
+        if len(fields) < 5:
+            return [('filename', fileName)]
+        violations = []
+        variable, table, model, experiment, ensemble = fields[:5]
+        for facet, value in (('table_id', table), ('experiment_id', experiment)):
+            if value not in self.facetSets[facet]:
+                violations.append((facet, value))
+        if not drsPatterns['ensemble_member'].match(ensemble):
+            violations.append(('ensemble_member', ensemble))
+        # Filename elements must agree with the directory they reside in
+        if len(parts) == len(drsFacets):
+            directory = dict(zip([facet for facet, _ in drsFacets], parts))
+            for facet, value in (('variable', variable), ('table_id', table), ('model', model),
+                                 ('experiment_id', experiment), ('ensemble_member', ensemble)):
+                if directory[facet] != value:
+                    violations.append(('filename_mismatch', ':'.join([facet, value])))
+        return violations
+
+
+# Worker process state, compiled once per worker by initWorker
+_validator = None
+
+
+def initWorker(cvs, root):
+    global _validator
+    _validator = DRSValidator(cvs, root)
+
+
+def validateBatch(paths):
+    """Validate a batch of paths in a worker, returning (count, [(path, violations)])"""
+    bad = []
+    for path in paths:
+        violations = _validator.validate(path)
+        if violations:
+            bad.append((path, violations))
+    return len(paths), bad
+
+
+def readPaths(fileNames):
+    """Yield stripped, non-empty lines from the named files or stdin"""
+    streams = [open(f) for f in fileNames] if fileNames else [sys.stdin]
+    for stream in streams:
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield line
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def validatePaths(paths, cvs, root=None, processes=None, onViolation=None):
+    """Validate an iterable of paths across a process pool
+
+    Returns (pathCount, badPathCount, {facet: Counter of invalid values}).
+    onViolation, when given, is called with (path, violations) for each bad path
+    """
+    facetCounts = collections.defaultdict(collections.Counter)
+    pathCount = badCount = 0
+    with multiprocessing.Pool(processes, initializer=initWorker, initargs=(cvs, root)) as pool:
+        for count, bad in pool.imap(validateBatch, batched(paths, batchSize)):
+            pathCount += count
+            badCount += len(bad)
+            for path, violations in bad:
+                for facet, value in violations:
+                    facetCounts[facet][value] += 1
+                if onViolation:
+                    onViolation(path, violations)
+    return pathCount, badCount, facetCounts
+
+
+class Suggester(object):
+    """Nearest valid term suggestions for invalid values, from a SuggestionIndex per facet"""
+
+    def __init__(self, cvs, k=3):
+        self.k = k
+        self.indexes = {}
+        for facet, cvName in drsFacets:
+            if cvName:
+                terms = set(cvs[cvName])
+                if facet == 'mip_era':
+                    # Valid paths carry the project, as accepted by the validator
+                    terms.add(project)
+                self.indexes[facet] = SuggestionIndex(sorted(terms))
+
+    def suggest(self, facet, value):
+        """Return a list of suggested terms, empty for facets without a CV"""
+        index = self.indexes.get(facet)
+        return [term for term, _ in index.suggest(value, self.k)] if index else []
+
+    def suggestAll(self, facetCounts):
+        """Return {facet: {value: [suggested terms]}} for all invalid CV values"""
+        return dict((facet, dict((value, self.suggest(facet, value)) for value in counts))
+                    for facet, counts in facetCounts.items() if facet in self.indexes)
+
+
+# %% Main
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Validate CMIP5 DRS paths against the CMIP5 CVs')
+    parser.add_argument('files', nargs='*', help='files listing one path per line (default: stdin)')
+    parser.add_argument('--root', help='path prefix preceding the DRS activity element')
+    parser.add_argument('--cvPath', default=cvPath, help='directory containing the CV json files')
+    parser.add_argument('--processes', type=int, help='worker processes (default: cpu count)')
+    parser.add_argument('--report', help='write per-facet violation counts to this json file')
+    parser.add_argument('--listViolations', action='store_true',
+                        help='print each invalid path and its violations')
+    parser.add_argument('--suggest', action='store_true',
+                        help='suggest the closest valid CV terms for invalid values')
+    args = parser.parse_args()
+    cvs = loadCVs(args.cvPath)
+    suggester = Suggester(cvs) if args.suggest else None
+
+    def printViolation(path, violations):
+        fields = [path]
+        for facet, value in violations:
+            suggestions = suggester.suggest(facet, value) if suggester else []
+            if suggestions:
+                value = ''.join([value, ' (', '|'.join(suggestions), ')'])
+            fields.append('='.join([facet, value]))
+        print('\t'.join(fields))
+
+    pathCount, badCount, facetCounts = validatePaths(
+        readPaths(args.files), cvs, args.root, args.processes,
+        printViolation if args.listViolations else None)
+    print('Paths validated:', pathCount, 'invalid:', badCount, file=sys.stderr)
+    for facet in sorted(facetCounts):
+        print(' '.join([facet, str(sum(facetCounts[facet].values())), 'violations,',
+                        str(len(facetCounts[facet])), 'distinct values']), file=sys.stderr)
+    if args.report:
+        with open(args.report, 'w') as fH:
+            report = {'paths': pathCount, 'invalid': badCount,
+                      'violations': {facet: dict(counts.most_common())
+                                     for facet, counts in facetCounts.items()}}
+            if suggester:
+                report['suggestions'] = suggester.suggestAll(facetCounts)
+            json.dump(report, fH, ensure_ascii=True, sort_keys=True, indent=4, separators=(',', ':'))
@@ -11,6 +11,16 @@ This script generates all controlled vocabulary (CV) json files residing this th
 PJD 10 Feb 2022     - Started
 PJD 10 Feb 2022     - Updated following details at https://pcmdi.llnl.gov/mips/cmip5/docs/cmip5_data_reference_syntax.pdf?id=37
 PJD  1 Sep 2022     - Added link to notes from Karl, remapping google doc
+agent 17 Oct 2026   - Added --incremental; CVs unchanged from the existing output files are not rewritten
+agent 17 Oct 2026   - Per-CV version_metadata from gitMetadata.py, the last commit changing the CV in this file
+agent 17 Oct 2026   - All targets written concurrently and atomically (cmip5CVs.writeAtomic) to --outDir,
+                      as pretty, minified and gzip'd json (--formats)
+agent 17 Oct 2026   - Added cross-CV constraints, table_id_constraints and experiment_id_constraints
+agent 17 Oct 2026   - CVs kept as literals, read without running this script by cmip5CVs.readDefinitions
+agent 17 Oct 2026   - Append new terms to the facet code registry, facetCodes.json
+agent 17 Oct 2026   - Write the CMIP5_CVs.marshal snapshot, internal to cmip5CVs, from the assembled CVs
+agent 17 Oct 2026   - Run as named, profiled pipeline stages (pipelineProfile.py); --profile writes a json
+                      report of wall/CPU time, peak allocation, bytes written and git calls per stage and CV
 
 @author: durack1
 """
@@ -18,33 +28,40 @@ PJD  1 Sep 2022     - Added link to notes from Karl, remapping google doc
 # %% imports
 
 # %% Set commit message and author info
+import argparse
 import datetime
 import calendar
+import concurrent.futures
 import gc
+import gzip
 import json
 import time
 import os
-import platform
+import gitMetadata as gitMetadataModule
+from cmip5CVs import constraintTargets, formatSuffixes, getCVHash, masterTargets, serializeCV, updateFacetCodes, \
+    writeAtomic, writeSnapshot
+from gitMetadata import GitMetadata
+from pipelineProfile import StageProfiler
 commitMessage = '\"initialize CMIP5_CVs\"'
 author = 'Paul J. Durack <durack1@llnl.gov>'
 author_institution_id = 'PCMDI'
 
-# %% List target controlled vocabularies (CVs)
-masterTargets = [
-    'activity_id',
-    'experiment_id',
-    'frequency',
-    'grid_label',
-    'institution_id',
-    'license',
-    'mip_era',
-    'nominal_resolution',
-    'realm',
-    'required_global_attributes',
-    'source_id',
-    'source_type',
-    'table_id'
-]
+# %% Parse arguments
+parser = argparse.ArgumentParser(description='Generate CMIP5 controlled vocabulary (CV) json files')
+parser.add_argument('--incremental', action='store_true',
+                    help='only rewrite CV files whose vocabulary differs from the CV in the existing output files')
+parser.add_argument('--formats', default='json,min,gz',
+                    help='comma separated output formats: json (indent=4), min (minified json), '
+                         'gz (gzip\'d minified json)')
+parser.add_argument('--outDir', default='..', help='directory the CV files are written to')
+parser.add_argument('--profile', metavar='REPORT',
+                    help='trace allocations and write a json profile of each pipeline stage and CV to REPORT')
+args = parser.parse_args()
+os.makedirs(args.outDir, exist_ok=True)
+
+# CVs are assigned as literals (or ''.join of literals), so each committed version of this file
+# can be read back without running it (cmip5CVs.readDefinitions, used by cvHistory.py and
+# gitMetadata.py for the per-CV version_metadata)
 
 # %% Activities
 activity_id = {
@@ -356,76 +373,223 @@ table_id = [
     'fx'
 ]
 
+# %% Cross-CV constraints
+# Allowed terms of other CVs, per term; a CV not listed is unconstrained
+# Table ids - the frequency and realms of the variables each table defines
+table_id_constraints = {
+    '3hr': {'frequency': ['3hr'], 'realm': ['atmos', 'land', 'ocean']},  # Needs checking
+    '6hrLev': {'frequency': ['6hr'], 'realm': ['atmos']},
+    '6hrPlev': {'frequency': ['6hr'], 'realm': ['atmos']},
+    '6hrPlevPt': {'frequency': ['6hr'], 'realm': ['atmos', 'land']},
+    'AERday': {'frequency': ['day'], 'realm': ['aerosol', 'atmos']},
+    'AERhr': {'frequency': ['1hr'], 'realm': ['aerosol', 'atmos', 'atmosChem']},
+    'AERmon': {'frequency': ['mon'], 'realm': ['aerosol', 'atmos', 'atmosChem']},
+    'AERmonZ': {'frequency': ['mon'], 'realm': ['aerosol', 'atmos', 'atmosChem']},
+    'Amon': {'frequency': ['mon'], 'realm': ['atmos']},
+    'CF3hr': {'frequency': ['3hr'], 'realm': ['atmos']},
+    'CFday': {'frequency': ['day'], 'realm': ['atmos']},
+    'CFmon': {'frequency': ['mon'], 'realm': ['atmos']},
+    'CFsubhr': {'realm': ['atmos']},
+    'E1hr': {'frequency': ['1hr'], 'realm': ['atmos']},
+    'E1hrClimMon': {'realm': ['atmos']},
+    'E3hr': {'frequency': ['3hr'], 'realm': ['atmos', 'land']},
+    'E3hrPt': {'frequency': ['3hr'], 'realm': ['aerosol', 'atmos']},
+    'E6hrZ': {'frequency': ['6hr'], 'realm': ['atmos']},
+    'Eday': {'frequency': ['day'], 'realm': ['atmos', 'land', 'landIce', 'ocean', 'seaIce']},
+    'EdayZ': {'frequency': ['day'], 'realm': ['atmos']},
+    'Efx': {'frequency': ['fx'], 'realm': ['atmos', 'land', 'landIce']},
+    'Emon': {'frequency': ['mon'], 'realm': ['aerosol', 'atmos', 'atmosChem', 'land', 'landIce', 'ocean', 'ocnBgchem', 'seaIce']},
+    'EmonZ': {'frequency': ['mon'], 'realm': ['atmos', 'atmosChem']},
+    'Esubhr': {'realm': ['atmos']},
+    'Eyr': {'frequency': ['yr'], 'realm': ['land', 'landIce']},
+    'IfxAnt': {'frequency': ['fx'], 'realm': ['land', 'landIce']},
+    'IfxGre': {'frequency': ['fx'], 'realm': ['land', 'landIce']},
+    'ImonAnt': {'frequency': ['mon'], 'realm': ['atmos', 'land', 'landIce']},
+    'ImonGre': {'frequency': ['mon'], 'realm': ['atmos', 'land', 'landIce']},
+    'IyrAnt': {'frequency': ['yr'], 'realm': ['land', 'landIce']},
+    'IyrGre': {'frequency': ['yr'], 'realm': ['land', 'landIce']},
+    'LImon': {'frequency': ['mon'], 'realm': ['land', 'landIce']},
+    'Lmon': {'frequency': ['mon'], 'realm': ['land']},
+    'Oclim': {'frequency': ['monC'], 'realm': ['ocean']},
+    'Oday': {'frequency': ['day'], 'realm': ['ocean', 'ocnBgchem']},
+    'Odec': {'realm': ['ocean', 'ocnBgchem']},
+    'Ofx': {'frequency': ['fx'], 'realm': ['ocean']},
+    'Omon': {'frequency': ['mon'], 'realm': ['ocean', 'ocnBgchem']},
+    'Oyr': {'frequency': ['yr'], 'realm': ['ocean', 'ocnBgchem']},
+    'SIday': {'frequency': ['day'], 'realm': ['seaIce']},
+    'SImon': {'frequency': ['mon'], 'realm': ['seaIce']},
+    'day': {'frequency': ['day'], 'realm': ['atmos', 'land', 'ocean', 'seaIce']},
+    'fx': {'frequency': ['fx'], 'realm': ['atmos', 'land']}
+}
+
+# Experiments - prescribed SST and aquaplanet experiments have no ocean, ocean biogeochemistry or
+# sea ice output, aquaplanets no land output; table ids constrain experiments through their realms
+experiment_id_constraints = {
+    'amip': {'realm': ['aerosol', 'atmos', 'atmosChem', 'land', 'landIce']},
+    'amip4K': {'realm': ['aerosol', 'atmos', 'atmosChem', 'land', 'landIce']},
+    'amip4xCO2': {'realm': ['aerosol', 'atmos', 'atmosChem', 'land', 'landIce']},
+    'amipFuture': {'realm': ['aerosol', 'atmos', 'atmosChem', 'land', 'landIce']},
+    'aqua4K': {'realm': ['aerosol', 'atmos', 'atmosChem']},
+    'aqua4xCO2': {'realm': ['aerosol', 'atmos', 'atmosChem']},
+    'aquaControl': {'realm': ['aerosol', 'atmos', 'atmosChem']},
+    'sst2030': {'realm': ['aerosol', 'atmos', 'atmosChem', 'land', 'landIce']},
+    'sstClim': {'realm': ['aerosol', 'atmos', 'atmosChem', 'land', 'landIce']},
+    'sstClim4xCO2': {'realm': ['aerosol', 'atmos', 'atmosChem', 'land', 'landIce']},
+    'sstClimAerosol': {'realm': ['aerosol', 'atmos', 'atmosChem', 'land', 'landIce']},
+    'sstClimSulfate': {'realm': ['aerosol', 'atmos', 'atmosChem', 'land', 'landIce']}
+}
+
 # %% Write variables to files
-timeNow = datetime.datetime.now().strftime('%c')
-offset = (calendar.timegm(time.localtime()) -
-          calendar.timegm(time.gmtime()))/60/60  # Convert seconds to hrs
-# offset = ''.join(['{:03d}'.format(offset),'00']) # Pad with 00 minutes # Py2
-offset = ''.join(['{:03d}'.format(int(offset)), '00']
-                 )  # Pad with 00 minutes # Py3
-timeStamp = ''.join([timeNow, ' ', offset])
-del(timeNow, offset)
-
-for jsonName in masterTargets:
+def getTimeStamp():
+    """Return the local time and UTC offset, e.g. 'Sat Oct 17 21:02:37 2026 -0700'"""
+    timeNow = datetime.datetime.now().strftime('%c')
+    offset = (calendar.timegm(time.localtime()) -
+              calendar.timegm(time.gmtime()))/60/60  # Convert seconds to hrs
+    offset = ''.join(['{:03d}'.format(int(offset)), '00'])  # Pad with 00 minutes
+    return ''.join([timeNow, ' ', offset])
+
+
+def readPreviousHash(outBase, jsonName, fmt):
+    """Return the hash of the CV in an existing output file, None when missing or unreadable"""
+    outFile = ''.join([outBase, formatSuffixes[fmt]])
+    try:
+        with open(outFile, 'rb') as fH:
+            data = fH.read()
+        if fmt == 'gz':
+            data = gzip.decompress(data)
+        return getCVHash(json.loads(data.decode('utf-8'))[jsonName])
+    except (OSError, ValueError, EOFError, KeyError):
+        return None
+
+
+def emitCV(jsonName, outBase, jsonDict, formats):
+    """Serialize and atomically write one CV in all formats, returning bytes written"""
+    bytesWritten = 0
+    for fmt in formats:
+        with pipeline.stage('serialize', jsonName, parent='emit') as record:
+            record['format'] = fmt
+            data = serializeCV(jsonDict, fmt)
+        with pipeline.stage('write', jsonName, parent='emit') as record:
+            record['format'] = fmt
+            record['bytesWritten'] = writeAtomic(''.join([outBase, formatSuffixes[fmt]]), data)
+            record['files'] = 1
+        bytesWritten += record['bytesWritten']
+    return bytesWritten
+
+
+def printStage(event, record):
+    """Stage hook, print pipeline level stages as they end"""
+    if event == 'end' and record['target'] is None:
+        calls = ''.join([', {} {}'.format(count, counter)
+                         for counter, count in record['calls'].items() if count])
+        print('Stage {}: {:.3f} s wall, {:.3f} s cpu{}'.format(
+            record['stage'], record['wall'], record['cpu'], calls))
+
+
+formats = [fmt.strip() for fmt in args.formats.split(',') if fmt.strip()]
+for fmt in formats:
+    if fmt not in formatSuffixes:
+        parser.error(' '.join(['Unknown format:', fmt]))
+
+# Pipeline stages are profiled; allocations are only traced for --profile
+pipeline = StageProfiler(trace=bool(args.profile))
+pipeline.addCounter('gitCalls', lambda: gitMetadataModule.gitCallCount)
+if args.profile:
+    pipeline.addHook(printStage)
+
+with pipeline.stage('timestamp'):
+    timeStamp = getTimeStamp()
+
+# Get repo version/metadata - single git history walk, cached on HEAD
+with pipeline.stage('gitMetadata'):
+    gitMetadata = GitMetadata(os.path.realpath(__file__))
+    versionId = gitMetadata.getVersionId()
+    # Extract last recorded commit for src/writeJson.py
+    versionInfo1 = gitMetadata.getFileHistory(os.path.realpath(__file__))
+
+emitQueue = []
+
+for jsonName in masterTargets + constraintTargets:
+    # Skip targets without a CV definition (yet)
+    if jsonName not in globals():
+        print('CV not defined, skipping:', jsonName)
+        continue
     # Write file
     if jsonName == 'mip_era':
-        outFile = ''.join(['../', jsonName, '.json'])
+        outBase = os.path.join(args.outDir, jsonName)
     else:
-        outFile = ''.join(['../CMIP5_', jsonName, '.json'])
-    # Get repo version/metadata - from src/writeJson.py
+        outBase = os.path.join(args.outDir, ''.join(['CMIP5_', jsonName]))
+    outFile = ''.join([outBase, '.json'])
+    # Compare CV content against the previously written output
+    with pipeline.stage('hash', jsonName):
+        cvHash = getCVHash(globals()[jsonName])
+        unchanged = args.incremental and \
+            all(readPreviousHash(outBase, jsonName, fmt) == cvHash for fmt in formats)
+    if unchanged:
+        print('CV unchanged, skipping:', outFile)
+        continue
+    # Last commit that changed this CV in writeJson.py, uncommitted CVs take the current run details
+    with pipeline.stage('gitMetadata', jsonName):
+        cvHistory = gitMetadata.getCVHistory(jsonName, cvHash)
+    if not cvHistory:
+        cvHistory = {'timeStamp': timeStamp, 'commitMessage': commitMessage}
+    with pipeline.stage('assemble', jsonName):
+        versionInfo = {}
+        versionInfo['author'] = author
+        versionInfo['institution_id'] = author_institution_id
+        versionInfo['CV_collection_modified'] = timeStamp
+        versionInfo['CV_collection_version'] = versionId
+        versionInfo['_'.join([jsonName, 'CV_modified'])
+                    ] = cvHistory['timeStamp']
+        versionInfo['_'.join([jsonName, 'CV_note'])
+                    ] = cvHistory['commitMessage']
+        versionInfo['previous_commit'] = versionInfo1.get('previous_commit')
+        versionInfo['specs_doc'] = 'v6.2.7 (10th September 2018; https://goo.gl/v1drZl)'
 
-    # Extract last recorded commit for src/writeJson.py
-    # print(os.path.realpath(__file__))
-    versionInfo1 = getFileHistory(os.path.realpath(__file__))
-    versionInfo = {}
-    versionInfo['author'] = author
-    versionInfo['institution_id'] = author_institution_id
-    versionInfo['CV_collection_modified'] = timeStamp
-    versionInfo['CV_collection_version'] = versionId
-    versionInfo['_'.join([jsonName, 'CV_modified'])
-                ] = versionHistory[jsonName]['timeStamp']
-    versionInfo['_'.join([jsonName, 'CV_note'])
-                ] = versionHistory[jsonName]['commitMessage']
-    versionInfo['previous_commit'] = versionInfo1.get('previous_commit')
-    versionInfo['specs_doc'] = 'v6.2.7 (10th September 2018; https://goo.gl/v1drZl)'
-    del(versionInfo1)
-
-    # Check file exists
-    if os.path.exists(outFile):
-        print('File existing, purging:', outFile)
-        os.remove(outFile)
-    # Create host dictionary
-    jsonDict = {}
-    jsonDict[jsonName] = eval(jsonName)
-    # Append repo version/metadata
-    jsonDict['version_metadata'] = versionInfo
-    fH = open(outFile, 'w')
-    if platform.python_version().split('.')[0] == '2':
-        json.dump(
-            jsonDict,
-            fH,
-            ensure_ascii=True,
-            sort_keys=True,
-            indent=4,
-            separators=(
-                ',',
-                ':'),
-            encoding="utf-8")
-    elif platform.python_version().split('.')[0] == '3':
-        json.dump(
-            jsonDict,
-            fH,
-            ensure_ascii=True,
-            sort_keys=True,
-            indent=4,
-            separators=(
-                ',',
-                ':'))
-    fH.close()
+        # Create host dictionary
+        jsonDict = {}
+        jsonDict[jsonName] = globals()[jsonName]
+        # Append repo version/metadata
+        jsonDict['version_metadata'] = versionInfo
+    emitQueue.append((jsonName, outBase, jsonDict))
+
+# Emit all queued CVs concurrently, serialize and write stages are recorded per CV in the worker threads
+with pipeline.stage('emit') as record:
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        futures = dict((executor.submit(emitCV, jsonName, outBase, jsonDict, formats), outBase)
+                       for jsonName, outBase, jsonDict in emitQueue)
+        for future in concurrent.futures.as_completed(futures):
+            outBase = futures[future]
+            record['bytesWritten'] += future.result()
+            record['files'] += len(formats)
+            print('File written:', ''.join([outBase, formatSuffixes[formats[0]]]),
+                  '({} bytes in {} formats)'.format(future.result(), len(formats)))
+
+# Write the binary snapshot read by cmip5CVs; marshal is an internal cache for that module only, it is
+# Python version specific and unsafe for untrusted data, so no per-CV marshal files are published
+with pipeline.stage('snapshot') as record:
+    if emitQueue or not os.path.exists(os.path.join(args.outDir, 'CMIP5_CVs.marshal')):
+        snapshotFile = writeSnapshot(dict((key, globals()[key]) for key in masterTargets + constraintTargets
+                                          if key in globals()), args.outDir)
+        record['bytesWritten'] = os.path.getsize(snapshotFile)
+        record['files'] = 1
+        print('Writing snapshot:', snapshotFile)
+
+# Assign integer codes to new terms, existing codes never change
+with pipeline.stage('facetCodes'):
+    for jsonName, addedTerms in sorted(updateFacetCodes(
+            dict((key, globals()[key]) for key in masterTargets if key in globals())).items()):
+        print('Facet codes added:', jsonName, len(addedTerms))
+
+pipeline.close()
+if args.profile:
+    print('Profile written:', pipeline.writeReport(args.profile))
 
 # Cleanup
-del(jsonName, jsonDict, outFile)
+del(jsonName, outBase, outFile, cvHash, unchanged, emitQueue, formats)
+del(gitMetadata, versionId, versionInfo1, timeStamp, pipeline, record)
 del(activity_id, experiment_id, frequency, grid_label, institution_id, license,
     masterTargets, mip_era, nominal_resolution, realm, required_global_attributes,
-    source_id, source_type, sub_experiment_id, table_id)
+    source_type, table_id)
+del(constraintTargets, experiment_id_constraints, table_id_constraints)
 gc.collect()